@@ -4,61 +4,356 @@ Global Access Control for Kim (OpenClaw)
 Only approved users can message the bot at all.
 """
 
+import asyncio
+import atexit
+import functools
 import json
+import os
+import threading
+import time
 from pathlib import Path
-from datetime import datetime
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 # Storage
 ACCESS_FILE = Path(__file__).parent / "approved_users.json"
+OPS_FILE = Path(__file__).parent / "approved_users.log"  # append-only mutation log
 LOG_FILE = Path(__file__).parent / "access_requests.log"
 
+# Fold the mutation log into ACCESS_FILE once it grows past this many lines
+COMPACT_THRESHOLD = 1000
+
+# is_allowed re-checks the files on disk at most this often (seconds)
+STAT_INTERVAL = 1.0
+
+# Inside an event loop, mutations are buffered and written to OPS_FILE in
+# one batch after FLUSH_DELAY seconds or once FLUSH_MAX_OPS are pending
+FLUSH_DELAY = 0.5
+FLUSH_MAX_OPS = 100
+
 # Admin users
-ADMINS = {6217674573}  # Markus
+ADMINS: frozenset[int] = frozenset({6217674573})  # Markus
+
+# User groups kept as sets in memory (serialized as sorted lists)
+_GROUPS = ("approved", "pending", "rejected")
+
+# Per-user state, indexed into the replies used by request_access
+STATE_APPROVED, STATE_PENDING, STATE_REJECTED = range(3)
+_OP_STATE = {"request": STATE_PENDING, "approve": STATE_APPROVED, "reject": STATE_REJECTED}
+
+# In-memory copy of ACCESS_FILE + OPS_FILE, only re-read when either file's
+# mtime/size changes. "approved" is a frozen snapshot of the approved group
+# (a new object only when it changes); "allowed" is approved + admins, so
+# is_allowed is a single hash probe; "ops" counts the lines in OPS_FILE not yet compacted;
+# "checked" is when the files were last stat()ed.
+_CACHE = {"mtime": None, "data": None, "approved": frozenset(), "allowed": ADMINS, "state": {},
+          "ops": 0, "checked": float("-inf")}
+_ops_lock = threading.Lock()
+
+# Mutations applied in memory but not yet written: (op, user_id, log line)
+_pending_ops: list[tuple[str, int, bytes]] = []
+_flush_task: asyncio.Task | None = None
+
+# Callbacks notified with the new allowed set whenever it changes
+_allowed_listeners: list = []
+
+# access_requests.log stays open between entries (see _log_handle)
+_log_fh = None
+_log_lock = threading.Lock()
+
+
+def _loads(raw: bytes):
+    return orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
+
+
+def _dumps(obj, indent: bool = False) -> bytes:
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode()
+
+
+def _mtime(path: Path) -> tuple[int, int]:
+    """(mtime, size) of a file - size catches appends within one mtime tick."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return (0, 0)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _update_cache(data: dict, mtime: tuple, ops: int):
+    """Store freshly loaded/saved data in the in-memory cache."""
+    _CACHE["mtime"] = mtime
+    _CACHE["data"] = data
+    _set_approved(data["approved"])
+    # Built lowest-precedence first so approved wins if a user is in two groups
+    state = dict.fromkeys(data["rejected"], STATE_REJECTED)
+    state.update(dict.fromkeys(data["pending"], STATE_PENDING))
+    state.update(dict.fromkeys(data["approved"], STATE_APPROVED))
+    _CACHE["state"] = state
+    _CACHE["ops"] = ops
+    _CACHE["checked"] = time.monotonic()
+
+
+def _set_approved(approved: set):
+    approved = frozenset(approved)
+    if approved != _CACHE["approved"]:
+        _CACHE["approved"] = approved
+    _set_allowed(_CACHE["approved"].union(ADMINS))
+
+
+def _set_allowed(allowed: frozenset):
+    if allowed != _CACHE["allowed"]:
+        _CACHE["allowed"] = allowed
+        for callback in _allowed_listeners:
+            callback(allowed)
+
+
+def add_allowed_listener(callback):
+    """Call callback(allowed_ids) now and whenever the allowed set changes.
+
+    Lets the bot keep a Telegram-side user filter in sync with approvals.
+    """
+    _load_data()
+    _allowed_listeners.append(callback)
+    callback(_CACHE["allowed"])
+
+
+def _apply_op(data: dict, op: str, user_id: int):
+    """Apply a single mutation to the in-memory data."""
+    if op == "request":
+        data["pending"].add(user_id)
+    elif op == "approve":
+        data["pending"].discard(user_id)
+        data["rejected"].discard(user_id)
+        data["approved"].add(user_id)
+    elif op == "reject":
+        data["pending"].discard(user_id)
+        data["approved"].discard(user_id)
+        data["rejected"].add(user_id)
+
+
+def _replay_ops(data: dict) -> int:
+    """Replay OPS_FILE on top of the snapshot. Returns number of ops applied."""
+    count = 0
+    try:
+        with open(OPS_FILE, 'rb') as f:
+            for line in f:
+                try:
+                    entry = _loads(line)
+                    _apply_op(data, entry["op"], entry["uid"])
+                except (ValueError, KeyError):
+                    continue  # torn/garbled line from a crash
+                count += 1
+    except FileNotFoundError:
+        pass
+    return count
 
 
 def _load_data():
-    """Load approved users data."""
-    if not ACCESS_FILE.exists():
+    """Load approved users data (served from memory until the files change)."""
+    snapshot_mtime = _mtime(ACCESS_FILE)
+    if not snapshot_mtime[0]:
         data = {
-            "approved": list(ADMINS),
-            "pending": [],
-            "rejected": [],
+            "approved": set(ADMINS),
+            "pending": set(),
+            "rejected": set(),
             "admin": list(ADMINS)
         }
+        _replay_ops(data)
         _save_data(data)
         return data
     
+    mtime = (snapshot_mtime, _mtime(OPS_FILE))
+    if mtime == _CACHE["mtime"]:
+        _CACHE["checked"] = time.monotonic()
+        return _CACHE["data"]
+    
     try:
-        with open(ACCESS_FILE, 'r') as f:
-            data = json.load(f)
-            # Ensure all keys exist
-            for key in ["approved", "pending", "rejected", "admin"]:
-                if key not in data:
-                    data[key] = []
-            return data
+        data = _loads(ACCESS_FILE.read_bytes())
+        # Ensure all keys exist
+        for key in ["approved", "pending", "rejected", "admin"]:
+            if key not in data:
+                data[key] = []
+        for key in _GROUPS:
+            data[key] = set(data[key])
     except Exception:
-        return {"approved": list(ADMINS), "pending": [], "rejected": [], "admin": list(ADMINS)}
+        # Corrupt or half-written snapshot: fall back to admin-only defaults,
+        # cached like a real snapshot so later mutations have data to apply to
+        data = {"approved": set(ADMINS), "pending": set(), "rejected": set(), "admin": list(ADMINS)}
+    
+    ops = _replay_ops(data)
+    # Buffered mutations aren't on disk yet - keep them
+    for op, user_id, _ in _pending_ops:
+        _apply_op(data, op, user_id)
+    _update_cache(data, mtime, ops)
+    return data
 
 
 def _save_data(data):
-    """Save approved users data."""
-    with open(ACCESS_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
+    """Write a full snapshot of the data and clear the mutation log."""
+    # Compact on disk (fewer bytes per rewrite); use export() for a readable copy
+    tmp = ACCESS_FILE.with_suffix(".json.tmp")
+    tmp.write_bytes(_dumps(_serializable(data)))
+    os.replace(tmp, ACCESS_FILE)
+    # Everything in the log is now part of the snapshot
+    open(OPS_FILE, 'w').close()
+    # Our own write is already in memory - no need to re-read it
+    _update_cache(data, (_mtime(ACCESS_FILE), _mtime(OPS_FILE)), 0)
+
+
+def _serializable(data: dict) -> dict:
+    return {k: sorted(v) if isinstance(v, set) else v for k, v in data.items()}
+
+
+def export(path: Path = None) -> str:
+    """Return the current access data as indented JSON, optionally writing it to path."""
+    text = _dumps(_serializable(_load_data()), indent=True).decode()
+    if path is not None:
+        Path(path).write_text(text + "\n")
+    return text
+
+
+def _mutate(op: str, user_id: int):
+    """Apply a mutation in memory so is_allowed sees it immediately."""
+    with _ops_lock:
+        data = _load_data()
+        _apply_op(data, op, user_id)
+        _set_approved(data["approved"])
+        _CACHE["state"][user_id] = _OP_STATE[op]
+
+
+def _persist(op: str, user_id: int):
+    """Queue a mutation (already applied in memory) for the mutation log.
+
+    Outside an event loop it is written straight away; inside one, writes
+    are batched by a delayed background flush.
+    """
+    global _flush_task
+    entry = _dumps({"op": op, "uid": user_id, "ts": time.time()}) + b"\n"
+    with _ops_lock:
+        _pending_ops.append((op, user_id, entry))
+        pending = len(_pending_ops)
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        _flush()
+        return
+
+    if pending >= FLUSH_MAX_OPS:
+        _flush()
+    elif _flush_task is None or _flush_task.done():
+        _flush_task = asyncio.ensure_future(_delayed_flush())
+
+
+def _flush():
+    """Write all buffered mutations to the mutation log in one go."""
+    with _ops_lock:
+        if not _pending_ops:
+            return
+        # Re-apply in case the cache was reloaded from disk in the meantime
+        data = _CACHE["data"]
+        if data is None:
+            data = _load_data()
+        for op, user_id, _ in _pending_ops:
+            _apply_op(data, op, user_id)
+        with open(OPS_FILE, 'ab') as f:
+            f.write(b"".join(entry for _, _, entry in _pending_ops))
+        # Only dropped once written, so a failed flush is retried, not lost
+        ops = _CACHE["ops"] + len(_pending_ops)
+        _pending_ops.clear()
+        if ops >= COMPACT_THRESHOLD:
+            compact()
+        else:
+            _update_cache(data, (_mtime(ACCESS_FILE), _mtime(OPS_FILE)), ops)
+
+
+async def _delayed_flush():
+    await asyncio.sleep(FLUSH_DELAY)
+    await flush_now()
+
+
+async def flush_now():
+    """Write buffered mutations to disk (call before shutting down)."""
+    await asyncio.to_thread(_flush)
+
+
+atexit.register(_flush)
+
+
+def _record(op: str, user_id: int):
+    """Apply a mutation in memory and append it to the mutation log."""
+    _mutate(op, user_id)
+    _persist(op, user_id)
+
+
+def compact():
+    """Fold the mutation log into the ACCESS_FILE snapshot."""
+    _save_data(_load_data())
 
 
 def _log_request(user_id: int, username: str, action: str):
     """Log access request."""
-    timestamp = datetime.now().isoformat()
+    # Same format as datetime.now().isoformat(), without building a datetime
+    now = time.time()
+    timestamp = f"{time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(now))}.{int(now % 1 * 1e6):06d}"
     log_entry = f"[{timestamp}] User {user_id} (@{username or 'unknown'}): {action}\n"
     
-    with open(LOG_FILE, 'a') as f:
-        f.write(log_entry)
+    with _log_lock:
+        _log_handle().write(log_entry)
+
+
+def _log_handle():
+    """Line-buffered append handle for LOG_FILE, opened on first use."""
+    global _log_fh
+    if _log_fh is None or _log_fh.name != str(LOG_FILE):
+        if _log_fh is not None:
+            _log_fh.close()
+        _log_fh = open(LOG_FILE, 'a', buffering=1)
+    return _log_fh
+
+
+def _close_log():
+    global _log_fh
+    if _log_fh is not None:
+        _log_fh.close()
+        _log_fh = None
+
+
+atexit.register(_close_log)
 
 
 def is_allowed(user_id: int) -> bool:
     """Check if user is allowed to access the bot."""
-    data = _load_data()
-    return user_id in data.get("approved", []) or user_id in ADMINS
+    # Hot path: answer from memory, only looking at the files every
+    # STAT_INTERVAL. Our own writes update the cache immediately.
+    _refresh()
+    return user_id in _CACHE["allowed"]
+
+
+def approved_ids() -> frozenset:
+    """Approved user IDs from the in-memory snapshot.
+
+    The same object is returned until the approved group changes, so callers
+    can cache anything derived from it by identity.
+    """
+    _refresh()
+    return _CACHE["approved"]
+
+
+def _refresh():
+    """Re-check the files on disk if they haven't been looked at for STAT_INTERVAL."""
+    now = time.monotonic()
+    if now - _CACHE["checked"] >= STAT_INTERVAL:
+        # Claim this interval first so concurrent handler threads keep
+        # answering from the snapshot instead of all stat-ing the files
+        _CACHE["checked"] = now
+        _load_data()
 
 
 def is_admin(user_id: int) -> bool:
@@ -71,23 +366,15 @@ def request_access(user_id: int, username: str = None, first_name: str = None) -
     Handle access request from new user.
     Returns: (allowed, message_to_user)
     """
-    data = _load_data()
-    
-    # Check if already approved
-    if user_id in data.get("approved", []):
-        return True, ""
-    
-    # Check if already pending
-    if user_id in data.get("pending", []):
-        return False, get_pending_message()
+    _load_data()
     
-    # Check if rejected
-    if user_id in data.get("rejected", []):
-        return False, get_rejected_message()
+    # Known user - one lookup decides the reply
+    state = _CACHE["state"].get(user_id)
+    if state is not None:
+        return state == STATE_APPROVED, _STATE_MESSAGES[state]
     
     # New request - add to pending
-    data["pending"].append(user_id)
-    _save_data(data)
+    _record("request", user_id)
     _log_request(user_id, username, "REQUESTED ACCESS")
     
     # Notify admin (this would be implemented in the bot layer)
@@ -101,19 +388,7 @@ def approve_user(user_id: int, admin_id: int) -> bool:
     if not is_admin(admin_id):
         return False
     
-    data = _load_data()
-    
-    # Remove from pending/rejected if present
-    if user_id in data.get("pending", []):
-        data["pending"].remove(user_id)
-    if user_id in data.get("rejected", []):
-        data["rejected"].remove(user_id)
-    
-    # Add to approved
-    if user_id not in data.get("approved", []):
-        data["approved"].append(user_id)
-    
-    _save_data(data)
+    _record("approve", user_id)
     _log_request(user_id, "", f"APPROVED by admin {admin_id}")
     
     return True
@@ -124,68 +399,91 @@ def reject_user(user_id: int, admin_id: int) -> bool:
     if not is_admin(admin_id):
         return False
     
-    data = _load_data()
-    
-    # Remove from pending/approved if present
-    if user_id in data.get("pending", []):
-        data["pending"].remove(user_id)
-    if user_id in data.get("approved", []):
-        data["approved"].remove(user_id)
+    _record("reject", user_id)
+    _log_request(user_id, "", f"REJECTED by admin {admin_id}")
     
-    # Add to rejected
-    if user_id not in data.get("rejected", []):
-        data["rejected"].append(user_id)
+    return True
+
+
+async def approve_user_async(user_id: int, admin_id: int) -> bool:
+    """Admin approves a user without blocking the event loop on disk I/O."""
+    if not is_admin(admin_id):
+        return False
     
-    _save_data(data)
-    _log_request(user_id, "", f"REJECTED by admin {admin_id}")
+    _mutate("approve", user_id)
+    _persist("approve", user_id)
+    await asyncio.to_thread(_log_request, user_id, "", f"APPROVED by admin {admin_id}")
+    return True
+
+
+async def reject_user_async(user_id: int, admin_id: int) -> bool:
+    """Admin rejects a user without blocking the event loop on disk I/O."""
+    if not is_admin(admin_id):
+        return False
     
+    _mutate("reject", user_id)
+    _persist("reject", user_id)
+    await asyncio.to_thread(_log_request, user_id, "", f"REJECTED by admin {admin_id}")
     return True
 
 
 def get_stats() -> dict:
     """Get access statistics."""
-    data = _load_data()
+    # Group sizes are O(1) on the cached sets; like is_allowed, only go back
+    # to disk every STAT_INTERVAL instead of on every call
+    _refresh()
+    data = _CACHE["data"] or _load_data()
+    approved = len(data["approved"])
+    pending = len(data["pending"])
+    rejected = len(data["rejected"])
     return {
-        "approved": len(data.get("approved", [])),
-        "pending": len(data.get("pending", [])),
-        "rejected": len(data.get("rejected", [])),
-        "total_requests": sum([
-            len(data.get("approved", [])),
-            len(data.get("pending", [])),
-            len(data.get("rejected", []))
-        ]) - len(ADMINS)  # Exclude admins from count
+        "approved": approved,
+        "pending": pending,
+        "rejected": rejected,
+        "total_requests": approved + pending + rejected - len(ADMINS)  # Exclude admins from count
     }
 
 
 # Messages
 
+# Static replies are built once; gated users see these on every message
+PENDING_MESSAGE = (
+    "⏳ *Access Pending*\n\n"
+    "Hello! This is a private bot.\n\n"
+    "Your request has been sent to the admin for approval. "
+    "You'll be notified once access is granted.\n\n"
+    "_Please do not send multiple messages - this won't speed up the process._"
+)
+
+REJECTED_MESSAGE = (
+    "❌ *Access Denied*\n\n"
+    "Your request to use this bot has been declined.\n\n"
+    "If you believe this is an error, please contact @marcus_liangzhu"
+)
+
+APPROVED_NOTIFICATION = (
+    "✅ *Access Granted!*\n\n"
+    "You can now use this bot.\n\n"
+    "Available commands:\n"
+    "• /help - See all commands\n"
+    "• Formlabs features (if logged in)\n\n"
+    "Welcome!"
+)
+
+
+_STATE_MESSAGES = ("", PENDING_MESSAGE, REJECTED_MESSAGE)
+
+
 def get_pending_message() -> str:
-    return (
-        "⏳ *Access Pending*\n\n"
-        "Hello! This is a private bot.\n\n"
-        "Your request has been sent to the admin for approval. "
-        "You'll be notified once access is granted.\n\n"
-        "_Please do not send multiple messages - this won't speed up the process._"
-    )
+    return PENDING_MESSAGE
 
 
 def get_rejected_message() -> str:
-    return (
-        "❌ *Access Denied*\n\n"
-        "Your request to use this bot has been declined.\n\n"
-        "If you believe this is an error, please contact @marcus_liangzhu"
-    )
+    return REJECTED_MESSAGE
 
 
 def get_approved_notification() -> str:
-    return (
-        "✅ *Access Granted!*\n\n"
-        "You can now use this bot.\n\n"
-        "Available commands:\n"
-        "• /help - See all commands\n"
-        "• Formlabs features (if logged in)\n\n"
-        "Welcome!"
-    )
+    return APPROVED_NOTIFICATION
 
 
 def notify_admin_new_request(user_id: int, username: str, first_name: str):
@@ -198,8 +496,12 @@ def notify_admin_new_request(user_id: int, username: str, first_name: str):
 
 def get_admin_notification(user_id: int, username: str, first_name: str) -> str:
     """Get notification message for admin."""
+    return _admin_notification(user_id, username, first_name, get_stats()['pending'])
+
+
+@functools.lru_cache(maxsize=256)
+def _admin_notification(user_id: int, username: str, first_name: str, pending: int) -> str:
     name = first_name or username or "Unknown"
-    stats = get_stats()
     
     return (
         f"🔔 *New Access Request*\n\n"
@@ -210,5 +512,5 @@ def get_admin_notification(user_id: int, username: str, first_name: str) -> str:
         f"`/approve {user_id}`\n\n"
         f"To reject:\n"
         f"`/reject {user_id}`\n\n"
-        f"_Pending requests: {stats['pending']}_"
+        f"_Pending requests: {pending}_"
     )
@@ -14,7 +14,22 @@ Or:
 __version__ = "1.0.0"
 __author__ = "Markus"
 
-from .bot import run_bot, create_bot
-from .commands import handle_command, COMMANDS
-
 __all__ = ["run_bot", "create_bot", "handle_command", "COMMANDS"]
+
+# Submodules are imported on first attribute access (PEP 562) so that
+# "import bob" stays cheap until the bot is actually needed
+_LAZY = {
+    "run_bot": ".bot",
+    "create_bot": ".bot",
+    "handle_command": ".commands",
+    "COMMANDS": ".commands",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
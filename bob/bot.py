@@ -5,27 +5,24 @@ Bob - Kim Formlabs Telegram Bot
 The main bot runner that starts the Telegram bot and auth server.
 """
 
+from __future__ import annotations
+
 import asyncio
+import functools
 import logging
 import os
 import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from telegram import Update
-from telegram.ext import (
-    Application,
-    CommandHandler,
-    ContextTypes,
-)
-
-from mcp_formlabs.auth_server import get_auth_server, set_login_callback
-from mcp_formlabs.keychain import get_token, delete_token
-
-# Import command handlers from commands module
-from .commands import handle_command, is_approved
+# telegram, mcp_formlabs and .commands are imported where they are used so
+# that importing bob (or a helper from it) doesn't pull in the whole stack
+if TYPE_CHECKING:
+    from telegram import Update
+    from telegram.ext import Application, ContextTypes
 
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -54,6 +51,9 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
 
 async def login_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /login command - generates secure login link."""
+    from mcp_formlabs.auth_server import get_auth_server, set_login_callback
+    from mcp_formlabs.keychain import get_token
+
     if not update.effective_user or not update.message:
         return
 
@@ -119,6 +119,8 @@ async def login_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
 
 async def logout_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /logout command."""
+    from mcp_formlabs.keychain import delete_token, get_token
+
     if not update.effective_user or not update.message:
         return
 
@@ -140,120 +142,121 @@ async def logout_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         )
 
 
-async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle /status command."""
-    if not update.effective_user or not update.message:
-        return
-
-    user_id = update.effective_user.id
-    
-    # Use the command handler from commands module
-    result = handle_command('/status', user_id)
-    await update.message.reply_text(result, parse_mode="Markdown")
+# Commands that just forward to handle_command and reply with its result
+SIMPLE_COMMANDS = (
+    "status", "printers", "printer", "jobs", "materials", "help",
+    "approve", "reject", "users",
+    "cancel", "progress", "cost", "cartridges", "tanks", "fleet", "queue", "maintenance", "notify",
+    "batch",
+)
+# Commands that take arguments (everything except the original no-arg ones)
+PASS_ARGS = frozenset(SIMPLE_COMMANDS) - {"status", "printers", "printer", "materials", "help", "users"}
+# Formlabs features are for approved users only. A filters.User built from
+# the approved set lets PTB route everyone else to _access_gate up front.
+GATED_COMMANDS = frozenset({
+    "login", "printers", "printer", "jobs",
+    "cancel", "progress", "cost", "cartridges", "tanks", "fleet", "queue", "maintenance", "notify",
+    "batch",
+})
+# Commands that wait on the Formlabs API: reply with a placeholder straight
+# away and edit in the result once it arrives
+PLACEHOLDERS = {
+    "printers": "🖨️ Fetching printers...",
+    "printer": "🖨️ Fetching printers...",
+    "jobs": "📋 Fetching jobs...",
+}
+
+
+async def _dispatch(cmd_name: str, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Generic handler for commands that delegate to handle_command."""
+    from rate_limit import send_slot
 
+    from .commands import handle_command_async
 
-async def printers_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle /printers command."""
     if not update.effective_user or not update.message:
         return
 
     user_id = update.effective_user.id
-    result = handle_command('/printers', user_id)
-    await update.message.reply_text(result, parse_mode="Markdown")
-
-
-async def printer_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle /printer command (alias for /printers)."""
-    if not update.effective_user or not update.message:
+    args = context.args if cmd_name[1:] in PASS_ARGS else None
+    pending = _unrepeated(user_id, handle_command_async(cmd_name, user_id, args=args))
+
+    chat_id = update.message.chat_id
+    placeholder = PLACEHOLDERS.get(cmd_name[1:])
+    if placeholder:
+        await send_slot(chat_id, placeholder)
+        message = await update.message.reply_text(placeholder)
+        context.application.create_task(_fill_placeholder(message, pending), update=update)
         return
 
-    user_id = update.effective_user.id
-    result = handle_command('/printer', user_id)
-    await update.message.reply_text(result, parse_mode="Markdown")
+    result = await pending
+    if result:  # empty when a repeat reply is suppressed
+        await send_slot(chat_id, result)
+        await update.message.reply_text(result, parse_mode="Markdown")
 
 
-async def jobs_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle /jobs command."""
-    if not update.effective_user or not update.message:
-        return
+def _repeat_notice(user_id: int, text: str) -> bool:
+    """True for a pending-approval notice the user already got within the
+    last minute - those aren't resent, so strangers can't make Bob spam."""
+    from rate_limit import recently_told
 
-    user_id = update.effective_user.id
-    args = context.args
-    result = handle_command('/jobs', user_id, args=args)
-    await update.message.reply_text(result, parse_mode="Markdown")
+    from .commands import PENDING_APPROVAL_MESSAGE
 
+    return text == PENDING_APPROVAL_MESSAGE and recently_told(user_id)
 
-async def materials_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle /materials command."""
-    if not update.effective_user or not update.message:
-        return
-
-    user_id = update.effective_user.id
-    result = handle_command('/materials', user_id)
-    await update.message.reply_text(result, parse_mode="Markdown")
 
+async def _unrepeated(user_id: int, pending) -> str:
+    """The command's reply, or "" if it is a repeated pending-approval notice."""
+    result = await pending
+    return "" if _repeat_notice(user_id, result) else result
 
-async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle /help command."""
-    if not update.effective_user or not update.message:
-        return
 
-    user_id = update.effective_user.id
-    result = handle_command('/help', user_id)
-    await update.message.reply_text(result, parse_mode="Markdown")
+async def _fill_placeholder(message, pending) -> None:
+    """Replace a placeholder reply with the command's result."""
+    from rate_limit import send_slot
 
+    result = await pending
+    if result:
+        await send_slot(message.chat_id, result, edit=True)
+        await message.edit_text(result, parse_mode="Markdown")
+    else:
+        await message.delete()
 
-async def approve_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle /approve command (admin only)."""
-    if not update.effective_user or not update.message:
-        return
 
-    user_id = update.effective_user.id
-    args = context.args
-    result = handle_command('/approve', user_id, args=args)
-    await update.message.reply_text(result, parse_mode="Markdown")
+async def _access_gate(callbacks: dict, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle a gated command from a user outside the approved filter.
+    
+    Same reply as the commands give unapproved users; nobody is registered
+    as pending here (that is check_access.py's job).
+    """
+    from approval_system import is_approved
+    from rate_limit import send_slot
 
+    from .commands import PENDING_APPROVAL_MESSAGE
 
-async def reject_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle /reject command (admin only)."""
     if not update.effective_user or not update.message:
         return
 
     user_id = update.effective_user.id
-    args = context.args
-    result = handle_command('/reject', user_id, args=args)
-    await update.message.reply_text(result, parse_mode="Markdown")
-
-
-async def users_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle /users command (admin only)."""
-    if not update.effective_user or not update.message:
+    # is_approved may re-read approved_users.json - keep that off the loop
+    if await asyncio.to_thread(is_approved, user_id):
+        # Approved since the filter was last synced (e.g. via check_access.py);
+        # that reload also re-synced the filter
+        command = update.message.text.split()[0][1:].split("@")[0].lower()
+        await callbacks[command](update, context)
         return
 
-    user_id = update.effective_user.id
-    result = handle_command('/users', user_id)
-    await update.message.reply_text(result, parse_mode="Markdown")
-
-
-async def _generic_command(cmd_name: str, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Generic handler for commands that delegate to handle_command."""
-    if not update.effective_user or not update.message:
+    if _repeat_notice(user_id, PENDING_APPROVAL_MESSAGE):
         return
-    user_id = update.effective_user.id
-    result = handle_command(cmd_name, user_id, args=context.args)
-    await update.message.reply_text(result, parse_mode="Markdown")
-
-
-# Factory to create command handlers for new features
-def _make_handler(cmd_name: str):
-    async def handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-        await _generic_command(cmd_name, update, context)
-    handler.__name__ = f"{cmd_name.strip('/')}_command"
-    return handler
+    await send_slot(update.message.chat_id, PENDING_APPROVAL_MESSAGE)
+    await update.message.reply_text(PENDING_APPROVAL_MESSAGE, parse_mode="Markdown")
 
 
 def create_bot(token: str | None = None) -> Application:
     """Create and configure Bob."""
+    from telegram.ext import Application, CommandHandler, filters
+
+    from approval_system import add_allowed_listener
+
     bot_token = token or os.getenv("TELEGRAM_BOT_TOKEN") or os.getenv("BOB_TELEGRAM_TOKEN")
     if not bot_token:
         raise ValueError(
@@ -262,29 +265,35 @@ def create_bot(token: str | None = None) -> Application:
 
     application = Application.builder().token(bot_token).build()
 
-    # Core handlers (original)
-    application.add_handler(CommandHandler("start", start_command))
-    application.add_handler(CommandHandler("login", login_command))
-    application.add_handler(CommandHandler("logout", logout_command))
-    application.add_handler(CommandHandler("status", status_command))
-    application.add_handler(CommandHandler("printers", printers_command))
-    application.add_handler(CommandHandler("printer", printer_command))
-    application.add_handler(CommandHandler("jobs", jobs_command))
-    application.add_handler(CommandHandler("materials", materials_command))
-    application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("approve", approve_command))
-    application.add_handler(CommandHandler("reject", reject_command))
-    application.add_handler(CommandHandler("users", users_command))
-
-    # New feature handlers
-    for cmd in ["cancel", "progress", "cost", "cartridges", "tanks", "fleet", "queue", "maintenance", "notify"]:
-        application.add_handler(CommandHandler(cmd, _make_handler(f"/{cmd}")))
+    approved = filters.User(allow_empty=True)
+
+    def sync_approved(allowed_ids: frozenset) -> None:
+        approved.user_ids = allowed_ids
+
+    add_allowed_listener(sync_approved)
+
+    callbacks = {"start": start_command, "login": login_command, "logout": logout_command}
+    for name in SIMPLE_COMMANDS:
+        callbacks[name] = functools.partial(_dispatch, f"/{name}")
+
+    for name, callback in callbacks.items():
+        gate = approved if name in GATED_COMMANDS else None
+        application.add_handler(CommandHandler(name, callback, filters=gate))
+
+    application.add_handler(CommandHandler(
+        sorted(GATED_COMMANDS), functools.partial(_access_gate, callbacks), filters=~approved
+    ))
 
     return application
 
 
 async def run_bot(token: str | None = None) -> None:
     """Run Bob."""
+    from approval_system import flush_now
+    from mcp_formlabs.auth_server import get_auth_server
+
+    from .commands import close_http_session
+
     # Start auth server
     auth_server = get_auth_server()
     auth_server.start()
@@ -308,6 +317,8 @@ async def run_bot(token: str | None = None) -> None:
         await application.updater.stop()
         await application.stop()
         await application.shutdown()
+        await flush_now()
+        await close_http_session()
         auth_server.stop()
 
 
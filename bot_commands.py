@@ -6,90 +6,273 @@ This module provides bot commands that can be used by OpenClaw
 to interact with the Formlabs API.
 """
 
+import asyncio
+import atexit
+import functools
+import importlib
+import importlib.util
+import io
+import operator
 import os
 import sys
+import threading
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import islice
 from pathlib import Path
 
+from cachetools import TLRUCache, TTLCache
+
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from mcp_formlabs.preform_client import PreFormClient, PreFormError
 from mcp_formlabs.keychain import get_token, delete_token
 from mcp_formlabs.materials import MATERIALS
+from mcp_formlabs.bars import BARS_10, BARS_15
+from mcp_formlabs.http_pool import pooled_session
+from mcp_formlabs.web_api_client import FormlabsWebClient, WebAPIError
+from mcp_formlabs.cost_calculator import summarize_costs, format_cost_report
+from mcp_formlabs.tank_monitor import format_tank_status
+from mcp_formlabs.fleet_analytics import format_fleet_overview, format_fleet_stats, compute_fleet_stats
+from mcp_formlabs.maintenance_tracker import MaintenanceTracker
+from mcp_formlabs.notification_service import NotificationDB
+from disk_cache import file_digest
+from rate_limit import HEAVY, rate_limited
 from approval_system import (
     is_approved, is_admin, approve_user, reject_user,
+    approve_user_async, reject_user_async, _load_approved, ADMIN_USERS,
     get_approval_request_message, get_admin_approval_notification,
     get_approved_message, get_rejected_message, get_approved_count
 )
 
-# Import new features
-try:
-    from fixture_generator import generate_fixture, StandardLibrary
-    HAS_FIXTURE = True
-except ImportError:
-    HAS_FIXTURE = False
+# Optional features - only check they're installed here; the modules (and
+# their CAD/vision dependency chains) are imported on first use
+HAS_FIXTURE = importlib.util.find_spec("fixture_generator") is not None
+HAS_RESIN = importlib.util.find_spec("resin_prophet") is not None
+HAS_CSI = importlib.util.find_spec("csi_analyzer") is not None
+
+
+@functools.cache
+def _feature(name: str):
+    """Import an optional feature module, or None if it fails to import."""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
 
 try:
-    from resin_prophet import ResinProphet, cmd_resin_status, cmd_resin_add, cmd_resin_alert
-    HAS_RESIN = True
+    import aiohttp
+    HAS_AIOHTTP = True
 except ImportError:
-    HAS_RESIN = False
+    HAS_AIOHTTP = False
 
 try:
-    from csi_analyzer import cmd_csi, cmd_analyze
-    HAS_CSI = True
+    import orjson
+    HAS_ORJSON = True
 except ImportError:
-    HAS_CSI = False
+    HAS_ORJSON = False
+
+AUTH_SERVER_URL = "http://127.0.0.1:8765"
+PUBLIC_AUTH_URL = "https://kim.harwav.com"
+
+
+PENDING_APPROVAL_MESSAGE = "⏳ Access pending approval. Please contact @marcus_liangzhu"
+
+
+def _pending_approval(telegram_user_id: int) -> str:
+    """Reply for unapproved users (bob suppresses repeats within a minute)."""
+    return PENDING_APPROVAL_MESSAGE
+
+
+CLIENT_TTL = 300
+
+
+def _client_ttu(telegram_user_id: int, client: PreFormClient, now: float) -> float:
+    """Keep a client for CLIENT_TTL seconds, but never past its token's expiry."""
+    if client.token_expires_at is None:
+        return now + CLIENT_TTL
+    return min(now + CLIENT_TTL, client.token_expires_at)
+
+
+# Authenticated clients per user - skips the keychain read and keeps the
+# client's HTTP session (and its keep-alive connections) between commands
+_client_cache = TLRUCache(maxsize=2048, ttu=_client_ttu, timer=time.time)
+_client_lock = threading.Lock()
 
 
 def get_client_for_user(telegram_user_id: int) -> PreFormClient | None:
     """Get a PreFormClient authenticated for a specific user."""
+    with _client_lock:
+        client = _client_cache.get(telegram_user_id)
+    if client is not None:
+        return client
+    
     client = PreFormClient()
     if not client.load_token_from_keychain(telegram_user_id):
         return None
+    with _client_lock:
+        _client_cache[telegram_user_id] = client
     return client
 
 
+def requires_client(func):
+    """Run func(telegram_user_id, client, ...) only for approved, logged-in users."""
+    @functools.wraps(func)
+    def wrapper(telegram_user_id: int, *args, **kwargs):
+        if not is_approved(telegram_user_id):
+            return _pending_approval(telegram_user_id)
+        
+        client = get_client_for_user(telegram_user_id)
+        if not client:
+            return "❌ Not logged in. Use /login first."
+        
+        return func(telegram_user_id, client, *args, **kwargs)
+    return wrapper
+
+
+# Device summaries per user - status/printers are often called back to back
+_devices_cache = TTLCache(maxsize=1024, ttl=30)
+_devices_lock = threading.Lock()
+
+
+PrinterGroup = namedtuple("PrinterGroup", "name count online")
+
+
+def _summarize_devices(devices: list) -> tuple[int, list[PrinterGroup]]:
+    """One pass over list_devices() groups: (total printers, non-empty groups)."""
+    total = 0
+    groups = []
+    for group in devices:
+        count = len(group.get('printers') or ())
+        if count:
+            total += count
+            groups.append(PrinterGroup(group.get('id', 'Unknown'), count, group.get('is_connected', False)))
+    return total, groups
+
+
+def _cached_device_summary(telegram_user_id: int, client: PreFormClient) -> tuple[int, list]:
+    """Summarized client.list_devices(), reused for up to 30s per user."""
+    with _devices_lock:
+        summary = _devices_cache.get(telegram_user_id)
+    if summary is None:
+        summary = _summarize_devices(client.list_devices().get('devices', []))
+        with _devices_lock:
+            _devices_cache[telegram_user_id] = summary
+    return summary
+
+
+# Keep-alive connection to the local auth server for the sync /login path
+# (the bot's event loop uses the aiohttp session below)
+_auth_session = pooled_session()
+atexit.register(_auth_session.close)
+
+
+@rate_limited()
 def cmd_login(telegram_user_id: int, username: str = None) -> str:
     """Generate a login URL for the user."""
-    import requests
-    
     # Check if user is approved
     if not is_approved(telegram_user_id):
-        # Notify admin
-        for admin_id in [6217674573]:  # Markus
-            # In real implementation, this would send a message to admin
-            pass
-        
-        return get_approval_request_message(telegram_user_id, username)
+        return _login_not_approved(telegram_user_id, username)
     
     try:
         # Call the auth server API to create a token
-        response = requests.post(
-            "http://127.0.0.1:8765/api/create-token",
+        response = _auth_session.post(
+            f"{AUTH_SERVER_URL}/api/create-token",
             json={"telegram_user_id": telegram_user_id},
             timeout=5
         )
         
         if response.status_code == 200:
-            data = response.json()
-            login_url = data.get("login_url", "")
-            # Replace localhost with public URL if needed
-            login_url = login_url.replace("http://127.0.0.1:8765", "https://kim.harwav.com")
-            
-            return (
-                "🔐 *Secure Login*\n\n"
-                "Click the link below to enter your Formlabs credentials:\n\n"
-                f"👉 {login_url}\n\n"
-                "_Your password is never sent through Telegram._\n"
-                "_The link expires in 10 minutes._"
-            )
+            data = orjson.loads(response.content) if HAS_ORJSON else response.json()
+            return _login_link_message(data)
         else:
             return "❌ Failed to generate login link. Please try again."
     except Exception as e:
         return f"❌ Error: {str(e)}"
 
 
+@rate_limited()
+async def cmd_login_async(telegram_user_id: int, username: str = None) -> str:
+    """Generate a login URL for the user without blocking the event loop."""
+    if not HAS_AIOHTTP:
+        # __wrapped__: this call was already rate limited above
+        return await asyncio.to_thread(cmd_login.__wrapped__, telegram_user_id, username)
+    
+    if not is_approved(telegram_user_id):
+        return _login_not_approved(telegram_user_id, username)
+    
+    try:
+        status, data = await _create_token_async(telegram_user_id)
+        if status == 200:
+            return _login_link_message(data)
+        else:
+            return "❌ Failed to generate login link. Please try again."
+    except Exception as e:
+        return f"❌ Error: {str(e)}"
+
+
+def _login_not_approved(telegram_user_id: int, username: str = None) -> str:
+    # Messaging the admins (get_admin_approval_notification) is up to the caller,
+    # which owns the Telegram bot
+    return get_approval_request_message(telegram_user_id, username)
+
+
+def _login_link_message(data: dict) -> str:
+    login_url = data.get("login_url", "")
+    # Replace localhost with public URL if needed
+    login_url = login_url.replace(AUTH_SERVER_URL, PUBLIC_AUTH_URL)
+    
+    return (
+        "🔐 *Secure Login*\n\n"
+        "Click the link below to enter your Formlabs credentials:\n\n"
+        f"👉 {login_url}\n\n"
+        "_Your password is never sent through Telegram._\n"
+        "_The link expires in 10 minutes._"
+    )
+
+
+# One aiohttp session per event loop, shared by all async outbound calls
+_http_session = None
+_http_session_loop = None
+
+
+def _get_http_session() -> "aiohttp.ClientSession":
+    global _http_session, _http_session_loop
+    loop = asyncio.get_running_loop()
+    if _http_session is None or _http_session.closed or _http_session_loop is not loop:
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=64),
+            timeout=aiohttp.ClientTimeout(total=5),
+        )
+        _http_session_loop = loop
+    return _http_session
+
+
+async def close_http_session():
+    """Close the shared aiohttp session (call on bot shutdown)."""
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
+
+async def _create_token_async(telegram_user_id: int) -> tuple[int, dict]:
+    """Ask the auth server for a login token. Returns (status, json body)."""
+    async with _get_http_session().post(
+        f"{AUTH_SERVER_URL}/api/create-token",
+        json={"telegram_user_id": telegram_user_id},
+    ) as resp:
+        if resp.status != 200:
+            return resp.status, {}
+        if HAS_ORJSON:
+            return resp.status, orjson.loads(await resp.read())
+        return resp.status, await resp.json()
+
+
+@rate_limited()
 def cmd_status(telegram_user_id: int) -> str:
     """Check login status and verify PreForm connection."""
     creds = get_token(telegram_user_id)
@@ -106,19 +289,8 @@ def cmd_status(telegram_user_id: int) -> str:
     
     if client:
         try:
-            result = client.list_devices()
-            devices = result.get('devices', [])
-            
-            # Count actual printers
-            total_printers = 0
-            total_groups = 0
-            for group in devices:
-                printers = group.get('printers', [])
-                if printers:
-                    total_printers += len(printers)
-                    total_groups += 1
-            
-            fleet_info = f"• Fleet: {total_printers} printers in {total_groups} groups\n"
+            total_printers, groups = _cached_device_summary(telegram_user_id, client)
+            fleet_info = f"• Fleet: {total_printers} printers in {len(groups)} groups\n"
         except Exception as e:
             fleet_info = f"• Fleet: Unable to fetch ({str(e)[:30]})\n"
     
@@ -135,6 +307,7 @@ def cmd_status(telegram_user_id: int) -> str:
     return status_msg
 
 
+@rate_limited()
 def cmd_logout(telegram_user_id: int) -> str:
     """Logout the user."""
     creds = get_token(telegram_user_id)
@@ -142,60 +315,45 @@ def cmd_logout(telegram_user_id: int) -> str:
     if not creds:
         return "You're not currently logged in."
     
+    with _devices_lock:
+        _devices_cache.pop(telegram_user_id, None)
+    with _client_lock:
+        _client_cache.pop(telegram_user_id, None)
+    with _web_client_lock:
+        _web_client_cache.pop(telegram_user_id, None)
+    
     if delete_token(telegram_user_id):
         return f"✅ Logged out successfully.\nYour Formlabs credentials for {creds.username} have been removed."
     else:
         return "❌ Failed to log out. Please try again."
 
 
-def cmd_printers(telegram_user_id: int) -> str:
+@rate_limited()
+@requires_client
+def cmd_printers(telegram_user_id: int, client: PreFormClient) -> str:
     """List all printers for the user."""
-    # Check approval
-    if not is_approved(telegram_user_id):
-        return "⏳ Access pending approval. Please contact @marcus_liangzhu"
-    
-    client = get_client_for_user(telegram_user_id)
-    
-    if not client:
-        return "❌ Not logged in. Use /login first."
-    
     try:
-        result = client.list_devices()
-        devices = result.get('devices', [])
+        total_printers, active_groups = _cached_device_summary(telegram_user_id, client)
         
-        if not devices:
+        if not total_printers:
             return "No printers found in your account."
         
-        # Count printers per group
-        total_printers = 0
-        active_groups = []
-        
-        for group in devices:
-            printers = group.get('printers', [])
-            if printers:
-                total_printers += len(printers)
-                active_groups.append({
-                    'name': group.get('id', 'Unknown'),
-                    'count': len(printers),
-                    'online': group.get('is_connected', False)
-                })
-        
         # Build response
-        response = (
+        parts = [
             f"🖨️ *Your Formlabs Fleet*\n"
             f"{total_printers} printers across {len(active_groups)} groups\n"
             f"{'=' * 30}\n\n"
-        )
+        ]
         
         # Show top groups (limit to avoid message too long)
         for group in active_groups[:10]:
-            emoji = "🟢" if group['online'] else "🔴"
-            response += f"{emoji} {group['name']}: {group['count']} printers\n"
+            emoji = "🟢" if group.online else "🔴"
+            parts.append(f"{emoji} {group.name}: {group.count} printers\n")
         
         if len(active_groups) > 10:
-            response += f"\n... and {len(active_groups) - 10} more groups"
+            parts.append(f"\n... and {len(active_groups) - 10} more groups")
         
-        return response
+        return "".join(parts)
         
     except PreFormError as e:
         return f"❌ API Error: {e.detail}"
@@ -203,79 +361,77 @@ def cmd_printers(telegram_user_id: int) -> str:
         return f"❌ Error: {str(e)}"
 
 
+@rate_limited()
 def cmd_materials(telegram_user_id: int) -> str:
     """List available materials."""
     # Check approval
     if not is_approved(telegram_user_id):
-        return "⏳ Access pending approval. Please contact @marcus_liangzhu"
-    
-    response = (
-        "🧪 *Available Materials*\n"
-        "=" * 30 + "\n\n"
-    )
+        return _pending_approval(telegram_user_id)
     
+    return _MATERIALS_MESSAGE
+
+
+def _render_materials() -> str:
     # Group by category
-    categories = {}
-    for code, info in MATERIALS.items():
-        cat = info.get('category', 'Other')
-        if cat not in categories:
-            categories[cat] = []
-        categories[cat].append(info['name'])
-    
-    for category, names in categories.items():
-        response += f"*{category}*\n"
-        for name in names:
-            response += f"  • {name}\n"
-        response += "\n"
+    categories = defaultdict(list)
+    for info in MATERIALS.values():
+        categories[info.get('category', 'Other')].append(info['name'])
     
-    return response
+    return "🧪 *Available Materials*\n" + "=" * 30 + "\n\n" + "".join(
+        f"*{category}*\n" + "".join(f"  • {name}\n" for name in names) + "\n"
+        for category, names in categories.items()
+    )
+
+
+# MATERIALS is static, so the listing is rendered once at import
+_MATERIALS_MESSAGE = _render_materials()
+
 
+JOBS_SHOWN = 10
 
-def cmd_jobs(telegram_user_id: int, status_filter: str | None = None) -> str:
+JOB_STATUS_EMOJI = {
+    'printing': '▶️',
+    'completed': '✅',
+    'failed': '❌',
+    'cancelled': '🚫',
+    'queued': '⏳'
+}
+
+
+@rate_limited()
+@requires_client
+def cmd_jobs(telegram_user_id: int, client: PreFormClient, status_filter: str | None = None) -> str:
     """List print jobs."""
-    # Check approval
-    if not is_approved(telegram_user_id):
-        return "⏳ Access pending approval. Please contact @marcus_liangzhu"
-    
-    client = get_client_for_user(telegram_user_id)
-    
-    if not client:
-        return "❌ Not logged in. Use /login first."
-    
     try:
         jobs = client.list_jobs(status=status_filter)
         
         if not jobs:
             return "📭 No print jobs found."
         
-        response = (
+        parts = [
             f"📋 *Print Jobs*\n"
             f"{'=' * 30}\n\n"
-        )
+        ]
         
-        # Show recent jobs (limit to 10)
-        for job in jobs[:10]:
+        # Show recent jobs (limit to JOBS_SHOWN)
+        emoji_for = JOB_STATUS_EMOJI.get
+        for job in islice(jobs, JOBS_SHOWN):
             job_name = job.get('name', 'Unnamed')
             job_status = job.get('status', 'Unknown')
             printer = job.get('printer', 'Unknown')
             
-            # Status emoji
-            status_emoji = {
-                'printing': '▶️',
-                'completed': '✅',
-                'failed': '❌',
-                'cancelled': '🚫',
-                'queued': '⏳'
-            }.get(job_status.lower(), '⬜')
+            status_emoji = emoji_for(job_status.lower(), '⬜')
             
-            response += f"{status_emoji} *{job_name}*\n"
-            response += f"   Status: {job_status}\n"
-            response += f"   Printer: {printer}\n\n"
+            parts.append(
+                f"{status_emoji} *{job_name}*\n"
+                f"   Status: {job_status}\n"
+                f"   Printer: {printer}\n\n"
+            )
         
-        if len(jobs) > 10:
-            response += f"... and {len(jobs) - 10} more jobs"
+        if len(jobs) > JOBS_SHOWN:
+            parts.append(f"... and {len(jobs) - JOBS_SHOWN} more jobs")
         
-        return response
+        return "".join(parts)
         
     except PreFormError as e:
         return f"❌ API Error: {e.detail}"
@@ -311,13 +467,40 @@ def cmd_reject(admin_id: int, target_user_id: int) -> str:
         return "❌ Failed to reject user."
 
 
+async def cmd_approve_async(admin_id: int, target_user_id: int) -> str:
+    """Admin: Approve a new user (for use inside the bot's event loop)."""
+    if not is_admin(admin_id):
+        return "❌ This command is only for admins."
+    
+    if await approve_user_async(target_user_id, admin_id):
+        return (
+            f"✅ User {target_user_id} has been approved!\n\n"
+            f"Total approved users: {get_approved_count()}"
+        )
+    else:
+        return "❌ Failed to approve user."
+
+
+async def cmd_reject_async(admin_id: int, target_user_id: int) -> str:
+    """Admin: Reject/remove a user (for use inside the bot's event loop)."""
+    if not is_admin(admin_id):
+        return "❌ This command is only for admins."
+    
+    if await reject_user_async(target_user_id, admin_id):
+        return (
+            f"🚫 User {target_user_id} has been rejected/removed.\n\n"
+            f"Total approved users: {get_approved_count()}"
+        )
+    else:
+        return "❌ Failed to reject user."
+
+
 def cmd_list_users(admin_id: int) -> str:
     """Admin: List all approved users."""
     if not is_admin(admin_id):
         return "❌ This command is only for admins."
     
-    from approval_system import _load_approved
-    approved = _load_approved()
+    approved = _sorted_approved()
     
     lines = [
         f"👥 *Approved Users* ({len(approved)} total)",
@@ -325,59 +508,73 @@ def cmd_list_users(admin_id: int) -> str:
         ""
     ]
     
-    for user_id in sorted(approved):
-        is_admin_badge = "👑 " if user_id in [6217674573] else ""
+    for user_id in approved:
+        is_admin_badge = "👑 " if user_id in ADMIN_USERS else ""
         lines.append(f"{is_admin_badge}`{user_id}`")
     
     return "\n".join(lines)
 
 
-def cmd_help(telegram_user_id: int) -> str:
-    """Show help message."""
-    is_user_admin = is_admin(telegram_user_id)
-
-    help_text = (
-        "🤖 *Kim Formlabs Bot Commands*\n\n"
-        "*Account:*\n"
-        "/login - Connect your Formlabs account\n"
-        "/status - Check connection status\n"
-        "/logout - Disconnect your account\n\n"
-        "*Fleet:*\n"
-        "/printers - List your printers\n"
-        "/fleet - Fleet dashboard overview\n"
-        "/fleet stats - Utilization statistics\n\n"
-        "*Printing:*\n"
-        "/jobs - View print jobs\n"
-        "/progress - Active print progress & ETA\n"
-        "/queue - View print queue\n"
-        "/cancel JOB\\_ID - Cancel a print job\n\n"
-        "*Consumables:*\n"
-        "/cartridges - Resin cartridge levels\n"
-        "/tanks - Tank lifecycle status\n"
-        "/materials - Available materials\n\n"
-        "*Tools:*\n"
-        "/cost - Print cost estimation\n"
-        "/maintenance - Maintenance schedule\n"
-        "/notify on|off - Print notifications\n\n"
-        "/kim on|off - Natural language mode\n"
-        "/help - This message"
-    )
+# Sorted approved ids for /users, keyed by the approved-set snapshot they were
+# built from (access_control hands out a new snapshot whenever it changes)
+_approved_sorted: tuple[frozenset, tuple[int, ...]] = (frozenset(), ())
 
-    if is_user_admin:
-        help_text += (
-            "\n\n*Admin Commands:*\n"
-            "/approve USER\\_ID - Approve a new user\n"
-            "/reject USER\\_ID - Reject/remove a user\n"
-            "/users - List all approved users"
-        )
 
-    return help_text
+def _sorted_approved() -> tuple[int, ...]:
+    global _approved_sorted
+    approved = _load_approved()
+    if approved is not _approved_sorted[0]:
+        _approved_sorted = (approved, tuple(sorted(approved)))
+    return _approved_sorted[1]
+
+
+HELP_TEXT = (
+    "🤖 *Kim Formlabs Bot Commands*\n\n"
+    "*Account:*\n"
+    "/login - Connect your Formlabs account\n"
+    "/status - Check connection status\n"
+    "/logout - Disconnect your account\n\n"
+    "*Fleet:*\n"
+    "/printers - List your printers\n"
+    "/fleet - Fleet dashboard overview\n"
+    "/fleet stats - Utilization statistics\n\n"
+    "*Printing:*\n"
+    "/jobs - View print jobs\n"
+    "/progress - Active print progress & ETA\n"
+    "/queue - View print queue\n"
+    "/cancel JOB\\_ID - Cancel a print job\n\n"
+    "*Consumables:*\n"
+    "/cartridges - Resin cartridge levels\n"
+    "/tanks - Tank lifecycle status\n"
+    "/materials - Available materials\n\n"
+    "*Tools:*\n"
+    "/cost - Print cost estimation\n"
+    "/maintenance - Maintenance schedule\n"
+    "/notify on|off - Print notifications\n"
+    "/batch /cmd1; /cmd2 - Run several commands at once\n\n"
+    "/kim on|off - Natural language mode\n"
+    "/help - This message"
+)
+
+HELP_TEXT_ADMIN = HELP_TEXT + (
+    "\n\n*Admin Commands:*\n"
+    "/approve USER\\_ID - Approve a new user\n"
+    "/reject USER\\_ID - Reject/remove a user\n"
+    "/users - List all approved users"
+)
+
+
+@rate_limited()
+def cmd_help(telegram_user_id: int) -> str:
+    """Show help message."""
+    return HELP_TEXT_ADMIN if is_admin(telegram_user_id) else HELP_TEXT
 
 
 # ============================================================================
 # NEW FEATURE COMMANDS
 # ============================================================================
 
+@rate_limited(HEAVY)
 def cmd_fixture(telegram_user_id: int, args: list = None) -> str:
     """Generate fixture for object.
     
@@ -386,15 +583,16 @@ def cmd_fixture(telegram_user_id: int, args: list = None) -> str:
       /fixture iphone_15_pro --operation soldering
       /fixture my_part.stl --operation drilling --clearance 10
     """
-    if not HAS_FIXTURE:
+    fixture = _feature("fixture_generator") if HAS_FIXTURE else None
+    if fixture is None:
         return "❌ Fixture generator not available. Install required dependencies."
     
     if not is_approved(telegram_user_id):
-        return "⏳ Access pending approval. Please contact @marcus_liangzhu"
+        return _pending_approval(telegram_user_id)
     
     if not args:
         # List available standard objects
-        available = StandardLibrary.list_all()
+        available = fixture.StandardLibrary.list_all()
         return (
             "🔧 *Fixture Generator*\n\n"
             "Generate custom holding jigs for your prints.\n\n"
@@ -410,25 +608,23 @@ def cmd_fixture(telegram_user_id: int, args: list = None) -> str:
     
     target = args[0]
     
-    # Parse options
+    # Parse options in one pass
     operation = "drilling"
     clearance = 5.0
     
-    if "--operation" in args:
-        idx = args.index("--operation")
-        if idx + 1 < len(args):
-            operation = args[idx + 1]
-    
-    if "--clearance" in args:
-        idx = args.index("--clearance")
-        if idx + 1 < len(args):
+    tokens = iter(args[1:])
+    for token in tokens:
+        if token == "--operation":
+            operation = next(tokens, operation)
+        elif token == "--clearance":
+            value = next(tokens, clearance)
             try:
-                clearance = float(args[idx + 1])
+                clearance = float(value)
             except ValueError:
-                pass
+                return f"❌ Invalid clearance: {value}. Use millimetres, e.g. --clearance 5"
     
     # Generate fixture
-    result = generate_fixture(
+    result = fixture.generate_fixture(
         target=target,
         operation=operation,
         clearance=clearance,
@@ -454,37 +650,117 @@ def cmd_fixture(telegram_user_id: int, args: list = None) -> str:
         return f"❌ {result.get('error', 'Unknown error')}"
 
 
+@rate_limited()
 def cmd_resin(telegram_user_id: int, args: list = None) -> str:
     """Show resin status."""
-    if not HAS_RESIN:
+    resin = _feature("resin_prophet") if HAS_RESIN else None
+    if resin is None:
         return "❌ Resin prophet not available."
     
     if not is_approved(telegram_user_id):
-        return "⏳ Access pending approval."
+        return _pending_approval(telegram_user_id)
     
     if args and args[0] == "add":
         # Add cartridge
         if len(args) < 3:
             return "Usage: /resin add <material_code> <material_name>"
         
-        return cmd_resin_add(telegram_user_id, args[1], args[2])
+        return resin.cmd_resin_add(telegram_user_id, args[1], args[2])
     
     if args and args[0] == "alert":
-        return cmd_resin_alert(telegram_user_id)
+        return resin.cmd_resin_alert(telegram_user_id)
     
-    return cmd_resin_status(telegram_user_id)
+    return resin.cmd_resin_status(telegram_user_id)
 
 
+@rate_limited(HEAVY)
 def cmd_csi_command(telegram_user_id: int, args: list = None, image_path: str = None) -> str:
     """Analyze failed print photo.
     
     Usage: /csi (with attached photo)
     """
-    if not HAS_CSI:
+    reply = _csi_precheck(telegram_user_id, image_path)
+    if reply is not None:
+        return reply
+    
+    future, key = _csi_claim(telegram_user_id, image_path)
+    if key is None:
+        return future.result()
+    return _csi_settle(key, future, functools.partial(_feature("csi_analyzer").cmd_csi, image_path))
+
+
+# Vision calls take seconds; inside the bot they run on their own small pool
+# and at most CSI_MAX_PENDING may be running or waiting at once
+CSI_MAX_PENDING = 8
+_csi_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="csi")
+_csi_slots = asyncio.Semaphore(CSI_MAX_PENDING)
+
+
+@rate_limited(HEAVY)
+async def cmd_csi_command_async(telegram_user_id: int, args: list = None, image_path: str = None) -> str:
+    """Analyze failed print photo without blocking the event loop."""
+    reply = _csi_precheck(telegram_user_id, image_path)
+    if reply is not None:
+        return reply
+    
+    future, key = _csi_claim(telegram_user_id, image_path)
+    if key is None:
+        return await asyncio.wrap_future(future)
+    
+    if _csi_slots.locked():
+        return _csi_settle(key, future, lambda: "🛑 CSI busy, try again in a minute.")
+    
+    async with _csi_slots:
+        loop = asyncio.get_running_loop()
+        analyze = functools.partial(_feature("csi_analyzer").cmd_csi, image_path)
+        return await loop.run_in_executor(_csi_pool, _csi_settle, key, future, analyze)
+
+
+# Analyses in flight per (user, image digest): a photo re-sent while its
+# analysis is running waits for that result instead of starting another
+_csi_inflight: dict[tuple[int, str], Future] = {}
+_csi_inflight_lock = threading.Lock()
+
+
+def _csi_claim(telegram_user_id: int, image_path: str) -> tuple[Future, tuple | None]:
+    """Join a running analysis of the same photo, or claim a new one.
+    
+    Returns (future, key). key is None when joining; otherwise the caller
+    must resolve the future with _csi_settle.
+    """
+    try:
+        digest = file_digest(image_path)
+    except OSError:
+        digest = image_path  # cmd_csi reports the missing file
+    key = (telegram_user_id, digest)
+    
+    with _csi_inflight_lock:
+        future = _csi_inflight.get(key)
+        if future is not None:
+            return future, None
+        future = _csi_inflight[key] = Future()
+    return future, key
+
+
+def _csi_settle(key: tuple, future: Future, analyze) -> str:
+    """Run a claimed analysis and hand its result to everyone waiting."""
+    try:
+        future.set_result(analyze())
+    except BaseException as e:
+        future.set_exception(e)
+    finally:
+        with _csi_inflight_lock:
+            _csi_inflight.pop(key, None)
+    return future.result()
+
+
+def _csi_precheck(telegram_user_id: int, image_path: str | None) -> str | None:
+    """Reply for /csi when there is nothing to analyze, else None."""
+    if not HAS_CSI or _feature("csi_analyzer") is None:
         return "❌ CSI analyzer not available. Set OPENAI_API_KEY environment variable."
     
     if not is_approved(telegram_user_id):
-        return "⏳ Access pending approval."
+        return _pending_approval(telegram_user_id)
     
     if not image_path:
         return (
@@ -500,30 +776,60 @@ def cmd_csi_command(telegram_user_id: int, args: list = None, image_path: str =
             "Send a photo with caption /csi"
         )
     
-    return cmd_csi(image_path)
+    return None
 
 
 # ============================================================================
 # WEB API FEATURE COMMANDS
 # ============================================================================
 
+# Authenticated Web API clients per user, kept for just under the OAuth
+# token lifetime so commands skip the token request
+WEB_TOKEN_TTL = 86400
+_web_client_cache = TTLCache(maxsize=512, ttl=WEB_TOKEN_TTL - 60)
+_web_client_lock = threading.Lock()
+
+
 def _get_web_client(telegram_user_id: int):
     """Get a FormlabsWebClient for the user. Returns None if not configured."""
+    with _web_client_lock:
+        client = _web_client_cache.get(telegram_user_id)
+    if client is not None:
+        return client
+    
     try:
-        from mcp_formlabs.web_api_client import FormlabsWebClient
         client = FormlabsWebClient()
         if client.client_id and client.client_secret:
             client.authenticate()
+            with _web_client_lock:
+                _web_client_cache[telegram_user_id] = client
             return client
     except Exception:
         pass
     return None
 
 
+def _bust_web_responses(telegram_user_id: int) -> None:
+    """Drop the user's cached Web API responses after a change (e.g. /cancel)."""
+    with _web_client_lock:
+        client = _web_client_cache.get(telegram_user_id)
+    if client is not None:
+        client.cache_bust()
+
+
+def _web_error(telegram_user_id: int, e: Exception) -> str:
+    """Error reply for a Web API command; drops the cached client on a 401."""
+    if isinstance(e, WebAPIError) and e.status_code == 401:
+        with _web_client_lock:
+            _web_client_cache.pop(telegram_user_id, None)
+    return f"❌ Error: {str(e)}"
+
+
+@rate_limited()
 def cmd_cancel(telegram_user_id: int, args: list = None) -> str:
     """Cancel a print job."""
     if not is_approved(telegram_user_id):
-        return "⏳ Access pending approval."
+        return _pending_approval(telegram_user_id)
 
     if not args:
         return "Usage: /cancel <job_id>\n\nUse /jobs to see active job IDs."
@@ -535,6 +841,7 @@ def cmd_cancel(telegram_user_id: int, args: list = None) -> str:
     job_id = args[0]
     try:
         client.cancel_job(job_id)
+        _bust_web_responses(telegram_user_id)
         return f"🚫 Job `{job_id}` has been cancelled."
     except PreFormError as e:
         return f"❌ Cancel failed: {e.detail}"
@@ -542,10 +849,32 @@ def cmd_cancel(telegram_user_id: int, args: list = None) -> str:
         return f"❌ Error: {str(e)}"
 
 
+# Row fields read by /progress and /cartridges, with their defaults. The C
+# itemgetter reads a complete row in one call; rows missing a key fall back
+# to dict.get.
+_PROGRESS_DEFAULTS = (
+    ("name", "Unknown"), ("printer", "unknown"),
+    ("currently_printing_layer", 0), ("layer_count", 0), ("estimated_time_remaining_ms", 0),
+)
+_CARTRIDGE_DEFAULTS = (
+    ("initial_volume_ml", 0), ("volume_dispensed_ml", 0), ("is_empty", False), ("material", "unknown"),
+)
+_progress_fields = operator.itemgetter(*(key for key, _ in _PROGRESS_DEFAULTS))
+_cartridge_fields = operator.itemgetter(*(key for key, _ in _CARTRIDGE_DEFAULTS))
+
+
+def _row_fields(getter, defaults: tuple, row: dict) -> tuple:
+    try:
+        return getter(row)
+    except KeyError:
+        return tuple(row.get(key, default) for key, default in defaults)
+
+
+@rate_limited()
 def cmd_progress(telegram_user_id: int, args: list = None) -> str:
     """Show progress of active prints."""
     if not is_approved(telegram_user_id):
-        return "⏳ Access pending approval."
+        return _pending_approval(telegram_user_id)
 
     web_client = _get_web_client(telegram_user_id)
     if not web_client:
@@ -558,18 +887,22 @@ def cmd_progress(telegram_user_id: int, args: list = None) -> str:
         if not prints:
             return "📭 No active prints right now."
 
-        lines = ["▶️ *Active Prints*", "=" * 28, ""]
+        buf = io.StringIO()
+        buf.write(f"▶️ *Active Prints*\n{'=' * 28}\n")
 
         for p in prints:
-            name = p.get("name", "Unknown")
-            printer = p.get("printer", "unknown")
-            current_layer = p.get("currently_printing_layer", 0) or 0
-            total_layers = p.get("layer_count", 0) or 0
-            eta_ms = p.get("estimated_time_remaining_ms", 0) or 0
-
-            percent = (current_layer / total_layers * 100) if total_layers > 0 else 0
-            bar_filled = int(percent / 100 * 15)
-            bar = f"[{'█' * bar_filled}{'░' * (15 - bar_filled)}]"
+            name, printer, current_layer, total_layers, eta_ms = _row_fields(_progress_fields, _PROGRESS_DEFAULTS, p)
+            current_layer = current_layer or 0
+            total_layers = total_layers or 0
+            eta_ms = eta_ms or 0
+
+            if total_layers > 0:
+                bar_filled = min(15, current_layer * 15 // total_layers)
+                # Rounded like the old {percent:.0f}, in integers
+                percent = (current_layer * 200 + total_layers) // (2 * total_layers)
+            else:
+                bar_filled = percent = 0
+            bar = BARS_15[bar_filled]
 
             eta_str = ""
             if eta_ms > 0:
@@ -577,56 +910,68 @@ def cmd_progress(telegram_user_id: int, args: list = None) -> str:
                 minutes = (eta_ms % 3_600_000) // 60_000
                 eta_str = f" | ETA: {hours}h {minutes}m"
 
-            lines.append(f"*{name}*")
-            lines.append(f"  Printer: {printer}")
-            lines.append(f"  {bar} {percent:.0f}%{eta_str}")
-            lines.append(f"  Layer {current_layer:,}/{total_layers:,}")
-            lines.append("")
+            buf.write(
+                f"\n*{name}*\n"
+                f"  Printer: {printer}\n"
+                f"  {bar} {percent}%{eta_str}\n"
+                f"  Layer {current_layer:,}/{total_layers:,}\n"
+            )
 
-        return "\n".join(lines)
+        return buf.getvalue()
     except Exception as e:
-        return f"❌ Error: {str(e)}"
+        return _web_error(telegram_user_id, e)
 
 
+_PERIODS = frozenset({"today", "week", "month", "all"})
+
+
+@functools.lru_cache(maxsize=8)
+def _since_for(period: str, minute_bucket: int) -> str | None:
+    """Start of a report period as an ISO date__gt filter, fixed within each minute.
+
+    /fleet stats requests within a minute send identical filters, so they hit
+    the same cached list_prints response (/cost streams via iter_prints and
+    isn't cached).
+    """
+    now = datetime.fromtimestamp(minute_bucket * 60)
+    if period == "today":
+        return now.replace(hour=0, minute=0).isoformat()
+    if period == "week":
+        return (now - timedelta(days=7)).isoformat()
+    if period == "all":
+        return None
+    return (now - timedelta(days=30)).isoformat()
+
+
+@rate_limited()
 def cmd_cost(telegram_user_id: int, args: list = None) -> str:
     """Show print cost estimates."""
     if not is_approved(telegram_user_id):
-        return "⏳ Access pending approval."
+        return _pending_approval(telegram_user_id)
 
     web_client = _get_web_client(telegram_user_id)
     if not web_client:
         return "❌ Web API not configured. Set FORMLABS_CLIENT_ID and FORMLABS_CLIENT_SECRET."
 
     try:
-        from mcp_formlabs.cost_calculator import summarize_costs, format_cost_report
-        from datetime import datetime, timedelta
-
         period = (args[0] if args else "month").lower()
-        if period == "today":
-            since = datetime.now().replace(hour=0, minute=0, second=0).isoformat()
-        elif period == "week":
-            since = (datetime.now() - timedelta(days=7)).isoformat()
-        elif period == "all":
-            since = None
-        else:
-            since = (datetime.now() - timedelta(days=30)).isoformat()
+        since = _since_for(period if period in _PERIODS else "month", int(time.time() // 60))
 
         params = {"status": "FINISHED", "per_page": 100}
         if since:
             params["date__gt"] = since
 
-        result = web_client.list_prints(**params)
-        prints = result.get("results", []) if isinstance(result, dict) else result
-        summary = summarize_costs(prints)
+        summary = summarize_costs(web_client.iter_prints(**params))
         return format_cost_report(summary)
     except Exception as e:
-        return f"❌ Error: {str(e)}"
+        return _web_error(telegram_user_id, e)
 
 
+@rate_limited()
 def cmd_cartridges(telegram_user_id: int) -> str:
     """Show cartridge status."""
     if not is_approved(telegram_user_id):
-        return "⏳ Access pending approval."
+        return _pending_approval(telegram_user_id)
 
     web_client = _get_web_client(telegram_user_id)
     if not web_client:
@@ -639,15 +984,22 @@ def cmd_cartridges(telegram_user_id: int) -> str:
         if not carts:
             return "🧪 No cartridges found."
 
-        lines = ["🧪 *Cartridge Status*", "=" * 28, ""]
+        buf = io.StringIO()
+        buf.write(f"🧪 *Cartridge Status*\n{'=' * 28}\n")
+        low = 0
 
         for c in carts:
-            initial = c.get("initial_volume_ml", 0) or 0
-            dispensed = c.get("volume_dispensed_ml", 0) or 0
+            initial, dispensed, is_empty, material = _row_fields(_cartridge_fields, _CARTRIDGE_DEFAULTS, c)
+            initial = initial or 0
+            dispensed = dispensed or 0
             remaining = max(0, initial - dispensed)
-            percent = (remaining / initial * 100) if initial > 0 else 0
-            is_empty = c.get("is_empty", False)
-            material = c.get("material", "unknown")
+            if initial > 0:
+                percent = remaining / initial * 100
+                bar_filled = min(10, int(remaining * 10 // initial))
+            else:
+                percent = bar_filled = 0
+            if percent < 30:
+                low += 1
 
             if is_empty or percent < 10:
                 icon = "🔴"
@@ -656,61 +1008,58 @@ def cmd_cartridges(telegram_user_id: int) -> str:
             else:
                 icon = "🟢"
 
-            bar_filled = int(percent / 100 * 10)
-            bar = f"[{'█' * bar_filled}{'░' * (10 - bar_filled)}]"
+            bar = BARS_10[bar_filled]
 
             name = c.get("display_name", c.get("serial", "unknown")[:12])
-            lines.append(f"{icon} *{name}*")
-            lines.append(f"   Material: {material}")
-            lines.append(f"   {bar} {percent:.0f}% ({remaining:.0f}ml / {initial:.0f}ml)")
-            if c.get("inside_printer"):
-                lines.append(f"   In: {c['inside_printer']}")
-            lines.append("")
+            inside = f"   In: {c['inside_printer']}\n" if c.get("inside_printer") else ""
+            buf.write(
+                f"\n{icon} *{name}*\n"
+                f"   Material: {material}\n"
+                f"   {bar} {percent:.0f}% ({remaining:.0f}ml / {initial:.0f}ml)\n"
+                f"{inside}"
+            )
 
-        low = sum(1 for c in carts if (c.get("initial_volume_ml", 0) or 0) - (c.get("volume_dispensed_ml", 0) or 0) < (c.get("initial_volume_ml", 1) or 1) * 0.3)
         if low:
-            lines.append(f"⚠️ {low} cartridge(s) below 30% — consider reordering!")
+            buf.write(f"\n⚠️ {low} cartridge(s) below 30% — consider reordering!")
 
-        return "\n".join(lines)
+        return buf.getvalue()
     except Exception as e:
-        return f"❌ Error: {str(e)}"
+        return _web_error(telegram_user_id, e)
 
 
+@rate_limited()
 def cmd_tanks(telegram_user_id: int) -> str:
     """Show tank status."""
     if not is_approved(telegram_user_id):
-        return "⏳ Access pending approval."
+        return _pending_approval(telegram_user_id)
 
     web_client = _get_web_client(telegram_user_id)
     if not web_client:
         return "❌ Web API not configured. Set FORMLABS_CLIENT_ID and FORMLABS_CLIENT_SECRET."
 
     try:
-        from mcp_formlabs.tank_monitor import format_tank_status
         result = web_client.list_tanks(per_page=50)
         tanks = result.get("results", []) if isinstance(result, dict) else result
         return format_tank_status(tanks)
     except Exception as e:
-        return f"❌ Error: {str(e)}"
+        return _web_error(telegram_user_id, e)
 
 
+@rate_limited()
 def cmd_fleet(telegram_user_id: int, args: list = None) -> str:
     """Show fleet dashboard."""
     if not is_approved(telegram_user_id):
-        return "⏳ Access pending approval."
+        return _pending_approval(telegram_user_id)
 
     web_client = _get_web_client(telegram_user_id)
     if not web_client:
         return "❌ Web API not configured. Set FORMLABS_CLIENT_ID and FORMLABS_CLIENT_SECRET."
 
     try:
-        from mcp_formlabs.fleet_analytics import format_fleet_overview, format_fleet_stats, compute_fleet_stats
-        from datetime import datetime, timedelta
-
         printers = web_client.list_printers()
 
         if args and args[0] == "stats":
-            since = (datetime.now() - timedelta(days=30)).isoformat()
+            since = _since_for("month", int(time.time() // 60))
             result = web_client.list_prints(date__gt=since, per_page=100)
             prints = result.get("results", []) if isinstance(result, dict) else result
             stats = compute_fleet_stats(printers, prints)
@@ -718,13 +1067,47 @@ def cmd_fleet(telegram_user_id: int, args: list = None) -> str:
 
         return format_fleet_overview(printers)
     except Exception as e:
-        return f"❌ Error: {str(e)}"
+        return _web_error(telegram_user_id, e)
+
 
+# Per-group queue requests are independent; they're fetched in parallel on
+# their own pool (not _io_pool, which /queue itself may be running on)
+_queue_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="queue")
 
+
+def _group_queue_message(groups: list, queues) -> str:
+    """Render the group queues (in group order), or "" if they're all empty."""
+    lines = ["📋 *Print Queue*", "=" * 28, ""]
+    i = 0
+    for group, items in zip(groups, queues):
+        gname = group.get("name", "Unknown")
+        for item in items:
+            i += 1
+            name = item.get("name", "Unknown")
+            material = item.get("material_name", "?")
+            lines.append(f"  {i}. {name} ({material}) — {gname}")
+    return "\n".join(lines) if i else ""
+
+
+def _queued_prints_message(result) -> str:
+    """Render QUEUED prints - the fallback when no group has a queue."""
+    queued = result.get("results", []) if isinstance(result, dict) else result
+    if not queued:
+        return "📭 Print queue is empty."
+
+    lines = ["📋 *Print Queue*", "=" * 28, ""]
+    for i, p in enumerate(queued, 1):
+        name = p.get("name", "Unknown")
+        material = p.get("material_name", p.get("material", "?"))
+        lines.append(f"  {i}. {name} ({material})")
+    return "\n".join(lines)
+
+
+@rate_limited()
 def cmd_queue(telegram_user_id: int, args: list = None) -> str:
     """Show print queue."""
     if not is_approved(telegram_user_id):
-        return "⏳ Access pending approval."
+        return _pending_approval(telegram_user_id)
 
     web_client = _get_web_client(telegram_user_id)
     if not web_client:
@@ -732,49 +1115,54 @@ def cmd_queue(telegram_user_id: int, args: list = None) -> str:
 
     try:
         groups = web_client.list_groups()
-        all_items = []
-
-        for group in groups:
-            gid = group.get("id", "")
-            gname = group.get("name", "Unknown")
-            items = web_client.get_group_queue(gid)
-            for item in items:
-                item["_group_name"] = gname
-                all_items.append(item)
-
-        if not all_items:
-            result = web_client.list_prints(status="QUEUED", per_page=20)
-            queued = result.get("results", []) if isinstance(result, dict) else result
-            if not queued:
-                return "📭 Print queue is empty."
-
-            lines = ["📋 *Print Queue*", "=" * 28, ""]
-            for i, p in enumerate(queued, 1):
-                name = p.get("name", "Unknown")
-                material = p.get("material_name", p.get("material", "?"))
-                lines.append(f"  {i}. {name} ({material})")
-            return "\n".join(lines)
-
-        lines = ["📋 *Print Queue*", "=" * 28, ""]
-        for i, item in enumerate(all_items, 1):
-            name = item.get("name", "Unknown")
-            material = item.get("material_name", "?")
-            group = item.get("_group_name", "?")
-            lines.append(f"  {i}. {name} ({material}) — {group}")
+        queues = _queue_pool.map(lambda g: web_client.get_group_queue(g.get("id", "")), groups)
+        return (
+            _group_queue_message(groups, queues)
+            or _queued_prints_message(web_client.list_prints(status="QUEUED", per_page=20))
+        )
+    except Exception as e:
+        return _web_error(telegram_user_id, e)
 
-        return "\n".join(lines)
+
+@rate_limited()
+async def cmd_queue_async(telegram_user_id: int, args: list = None) -> str:
+    """Show print queue, fetching every group's queue concurrently on the event loop."""
+    if not HAS_AIOHTTP:
+        # __wrapped__: this call was already rate limited above
+        return await asyncio.to_thread(cmd_queue.__wrapped__, telegram_user_id, args)
+
+    if not is_approved(telegram_user_id):
+        return _pending_approval(telegram_user_id)
+
+    web_client = await asyncio.to_thread(_get_web_client, telegram_user_id)
+    if not web_client:
+        return "❌ Web API not configured. Set FORMLABS_CLIENT_ID and FORMLABS_CLIENT_SECRET."
+
+    try:
+        groups = await asyncio.to_thread(web_client.list_groups)
+        # list_groups may be a cached response that never touched auth, so
+        # refresh the token here, once, before the concurrent requests
+        await asyncio.to_thread(web_client.ensure_authenticated)
+        session = _get_http_session()
+        queues = await asyncio.gather(
+            *(web_client.get_group_queue_async(g.get("id", ""), session) for g in groups)
+        )
+        message = _group_queue_message(groups, queues)
+        if not message:
+            result = await asyncio.to_thread(web_client.list_prints, status="QUEUED", per_page=20)
+            message = _queued_prints_message(result)
+        return message
     except Exception as e:
-        return f"❌ Error: {str(e)}"
+        return _web_error(telegram_user_id, e)
 
 
+@rate_limited()
 def cmd_maintenance(telegram_user_id: int, args: list = None) -> str:
     """Show maintenance schedule."""
     if not is_approved(telegram_user_id):
-        return "⏳ Access pending approval."
+        return _pending_approval(telegram_user_id)
 
     try:
-        from mcp_formlabs.maintenance_tracker import MaintenanceTracker, format_maintenance_status
-
         tracker = MaintenanceTracker()
 
         if args and len(args) >= 3 and args[0] == "done":
@@ -794,10 +1182,12 @@ def cmd_maintenance(telegram_user_id: int, args: list = None) -> str:
             return "No printers found."
 
         lines = ["🔧 *Maintenance Schedule*", "=" * 28, ""]
-        for p in printers[:5]:
+        shown = printers[:5]
+        due = tracker.get_due_tasks_bulk(telegram_user_id, [p.get("serial", "unknown") for p in shown])
+        for p in shown:
             serial = p.get("serial", "unknown")
             alias = p.get("alias", serial)
-            tasks = tracker.get_due_tasks(telegram_user_id, serial)
+            tasks = due[serial]
             overdue = [t for t in tasks if t["status"] in ("overdue", "never_done")]
             if overdue:
                 lines.append(f"⚠️ *{alias}* ({len(overdue)} overdue)")
@@ -810,17 +1200,16 @@ def cmd_maintenance(telegram_user_id: int, args: list = None) -> str:
         lines.append("Details: `/maintenance done <task_id> <printer_serial>`")
         return "\n".join(lines)
     except Exception as e:
-        return f"❌ Error: {str(e)}"
+        return _web_error(telegram_user_id, e)
 
 
+@rate_limited()
 def cmd_notify(telegram_user_id: int, args: list = None) -> str:
     """Manage print notifications."""
     if not is_approved(telegram_user_id):
-        return "⏳ Access pending approval."
+        return _pending_approval(telegram_user_id)
 
     try:
-        from mcp_formlabs.notification_service import NotificationDB
-
         db = NotificationDB()
         action = (args[0] if args else "status").lower()
 
@@ -843,6 +1232,29 @@ def cmd_notify(telegram_user_id: int, args: list = None) -> str:
         return f"❌ Error: {str(e)}"
 
 
+# /batch runs its commands side by side on their own pool (/batch itself
+# may be running on _io_pool)
+BATCH_MAX = 5
+_batch_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="batch")
+
+
+def cmd_batch(telegram_user_id: int, args: list = None) -> str:
+    """Run several commands at once and reply with all their output.
+    
+    Usage: /batch /fleet; /progress; /cartridges
+    """
+    commands = [c.split() for c in " ".join(args or ()).split(";") if c.strip()]
+    if not commands:
+        return "Usage: /batch /cmd1; /cmd2; ...\n\nExample: `/batch /fleet; /progress; /cartridges`"
+    if len(commands) > BATCH_MAX:
+        return f"❌ At most {BATCH_MAX} commands per batch."
+    if any(c[0].lower() == '/batch' for c in commands):
+        return "❌ /batch can't be nested."
+    
+    results = _batch_pool.map(lambda c: handle_command(c[0], telegram_user_id, args=c[1:]), commands)
+    return "\n\n".join(r for r in results if r)
+
+
 # Command dispatcher
 COMMANDS = {
     '/login': cmd_login,
@@ -870,40 +1282,116 @@ COMMANDS = {
     '/queue': cmd_queue,
     '/maintenance': cmd_maintenance,
     '/notify': cmd_notify,
+    '/batch': cmd_batch,
+}
+
+
+# Commands that take (user_id, target_id)
+_ADMIN_CMDS = frozenset({'/approve', '/reject'})
+# Commands that take (user_id, args)
+_ARG_CMDS = frozenset({
+    '/fixture', '/resin', '/csi', '/cancel', '/cost', '/fleet', '/queue', '/maintenance', '/notify',
+    '/batch',
+})
+
+
+# Calling conventions: how each handler takes (user_id, args, username)
+def _call_user(func, command, telegram_user_id, args, username):
+    return func(telegram_user_id)
+
+
+def _call_args(func, command, telegram_user_id, args, username):
+    return func(telegram_user_id, args)
+
+
+def _call_username(func, command, telegram_user_id, args, username):
+    return func(telegram_user_id, username)
+
+
+def _call_target(func, command, telegram_user_id, args, username):
+    target_id, error = _parse_target_id(command, args)
+    if error:
+        return error
+    return func(telegram_user_id, target_id)
+
+
+def _call_status(func, command, telegram_user_id, args, username):
+    # Optional status filter
+    if args:
+        return func(telegram_user_id, status_filter=args[0])
+    return func(telegram_user_id)
+
+
+_SPECIAL_CALLS = {'/login': _call_username, '/jobs': _call_status}
+
+# Lowercased command -> (handler, calling convention), resolved once here so
+# dispatch is a single lookup
+DISPATCH = {
+    cmd: (func, _call_target if cmd in _ADMIN_CMDS
+          else _call_args if cmd in _ARG_CMDS
+          else _SPECIAL_CALLS.get(cmd, _call_user))
+    for cmd, func in COMMANDS.items()
 }
 
 
 def handle_command(command: str, telegram_user_id: int, args: list = None, username: str = None) -> str:
     """Handle a bot command."""
-    cmd_func = COMMANDS.get(command.lower())
+    entry = DISPATCH.get(command.lower())
 
-    if not cmd_func:
+    if not entry:
         return f"Unknown command: {command}. Use /help for available commands."
 
-    # Commands that take (user_id, target_id)
-    if command.lower() in ['/approve', '/reject']:
-        if not args:
-            return f"Usage: {command} USER_ID"
-        try:
-            target_id = int(args[0])
-            return cmd_func(telegram_user_id, target_id)
-        except ValueError:
-            return f"Invalid user ID. Usage: {command} USER_ID"
+    func, call = entry
+    return call(func, command, telegram_user_id, args, username)
+
+
+# Worker threads for sync handlers called from the bot's event loop, so
+# concurrent /printers, /jobs, /status etc. overlap their network waits
+_io_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="io")
+
+# Commands with non-blocking variants for the bot's event loop
+ASYNC_COMMANDS = {
+    '/login': cmd_login_async,
+    '/csi': cmd_csi_command_async,
+    '/approve': cmd_approve_async,
+    '/reject': cmd_reject_async,
+    '/queue': cmd_queue_async,
+}
 
-    # Commands that take (user_id, args)
-    if command.lower() in ['/fixture', '/resin', '/csi', '/cancel', '/cost', '/fleet', '/queue', '/maintenance', '/notify']:
-        return cmd_func(telegram_user_id, args)
 
-    # Commands that need username
-    if command.lower() == '/login':
-        return cmd_func(telegram_user_id, username)
+def _parse_target_id(command: str, args: list | None) -> tuple[int | None, str]:
+    """Parse USER_ID for /approve and /reject. Returns (target_id, error)."""
+    if not args:
+        return None, f"Usage: {command} USER_ID"
+    try:
+        return int(args[0]), ""
+    except ValueError:
+        return None, f"Invalid user ID. Usage: {command} USER_ID"
+
+
+async def handle_command_async(command: str, telegram_user_id: int, args: list = None, username: str = None) -> str:
+    """Handle a bot command from inside an event loop."""
+    cmd = command.lower()
+    cmd_func = ASYNC_COMMANDS.get(cmd)
+
+    if not cmd_func:
+        # Sync handlers do blocking PreForm/Web API calls - keep them off the loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _io_pool,
+            functools.partial(handle_command, command, telegram_user_id, args=args, username=username),
+        )
+
+    if cmd == '/login':
+        return await cmd_func(telegram_user_id, username)
 
-    # Commands with optional status filter
-    if command.lower() == '/jobs' and args:
-        return cmd_jobs(telegram_user_id, status_filter=args[0])
+    if cmd in _ARG_CMDS:
+        return await cmd_func(telegram_user_id, args)
 
-    # Simple commands (user_id only)
-    return cmd_func(telegram_user_id)
+    target_id, error = _parse_target_id(command, args)
+    if error:
+        return error
+    return await cmd_func(telegram_user_id, target_id)
 
 
 if __name__ == "__main__":
@@ -912,7 +1400,7 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser()
     parser.add_argument("command")
-    parser.add_argument("--user-id", type=int, default=6217674573)
+    parser.add_argument("--user-id", type=int, default=min(ADMIN_USERS))
     args = parser.parse_args()
     
     result = handle_command(args.command, args.user_id)
@@ -11,7 +11,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from access_control import (
     is_allowed, request_access, approve_user, reject_user,
-    get_stats, is_admin, get_admin_notification
+    get_stats, is_admin, get_admin_notification, export
 )
 
 
@@ -24,8 +24,6 @@ def check_access(telegram_user_id: int, username: str = None, first_name: str =
         - If allowed=True, response is empty - process the message normally
         - If allowed=False, response is the message to send to user
     """
-    from access_control import get_admin_notification
-    
     # Check if already allowed
     if is_allowed(telegram_user_id):
         return True, ""
@@ -87,6 +85,7 @@ if __name__ == "__main__":
     parser.add_argument("command")
     parser.add_argument("--user-id", type=int, default=12345)
     parser.add_argument("--username", default="testuser")
+    parser.add_argument("--output", help="File to write for the export command (default: stdout)")
     args = parser.parse_args()
     
     if args.command == "check":
@@ -96,5 +95,9 @@ if __name__ == "__main__":
             print(f"Message: {msg}")
     elif args.command == "stats":
         print(get_stats())
+    elif args.command == "export":
+        text = export(args.output)
+        if not args.output:
+            print(text)
     else:
         print(f"Unknown command: {args.command}")
@@ -10,13 +10,56 @@ Author: Kim (OpenClaw)
 from __future__ import annotations
 
 import base64
+import functools
+import io
 import json
+import mmap
 import os
+import re
+from collections.abc import Mapping
 from dataclasses import dataclass
 from pathlib import Path
+from types import MappingProxyType
 from typing import Literal
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from disk_cache import DiskCache, file_digest
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch either
+_loads = orjson.loads if HAS_ORJSON else json.loads
+
+# GPT sometimes wraps its JSON answer in a markdown code block
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+# Photos above this are downscaled before upload (when Pillow is installed);
+# the vision model tiles at 768px, so extra resolution only adds latency
+MAX_UPLOAD_BYTES = 1024 * 1024
+MAX_IMAGE_EDGE = 1024
+
+B64_CHUNK = 3 * 64 * 1024  # a multiple of 3, so chunks encode without padding
+
+# Analyses are cached on disk by image content hash - users often resend the
+# same photo. Least recently used entries beyond CACHE_MAX_ENTRIES are dropped.
+CACHE_MAX_ENTRIES = 500
+_cache = DiskCache(
+    "csi", ".json", CACHE_MAX_ENTRIES, dumps=lambda data: json.dumps(data).encode(), loads=json.loads
+)
+
+SEVERITY_EMOJI = {"critical": "🚨", "major": "⚠️", "minor": "🔶", "cosmetic": "🔧"}
 
 
 # ============================================================================
@@ -110,11 +153,48 @@ Respond in JSON format:
 
 Be thorough but concise. Use your knowledge of resin printing physics and common failure modes."""
 
+    # The request body is serialized once; analyze() splices in the image
+    _PAYLOAD_HEAD, _PAYLOAD_TAIL = json.dumps({
+        "model": "gpt-4-vision-preview",
+        "messages": [
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": "Analyze this failed 3D print and provide diagnosis in JSON format."
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": "@IMAGE_URL@",
+                            "detail": "high"
+                        }
+                    }
+                ]
+            }
+        ],
+        "max_tokens": 1500,
+        "temperature": 0.3
+    }).encode().split(b"@IMAGE_URL@")
+    
     def __init__(self, api_key: str | None = None):
         """Initialize CSI analyzer."""
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key required. Set OPENAI_API_KEY environment variable.")
+        
+        # Keep-alive session so repeat uploads skip the TCP/TLS handshake
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        self._session.headers.update({
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        })
     
     def analyze(self, image_path: str | Path) -> CSIDiagnosis:
         """
@@ -131,90 +211,30 @@ Be thorough but concise. Use your knowledge of resin printing physics and common
         if not image_path.exists():
             raise FileNotFoundError(f"Image not found: {image_path}")
         
-        # Encode image
-        with open(image_path, "rb") as f:
-            image_data = base64.b64encode(f.read()).decode("utf-8")
-        
-        # Determine MIME type
-        mime_type = self._get_mime_type(image_path)
+        cache_key = file_digest(image_path)
+        cached = _cache.get(cache_key)
+        if cached is not None:
+            return self._to_diagnosis(cached)
         
-        # Build API request
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "model": "gpt-4-vision-preview",
-            "messages": [
-                {
-                    "role": "system",
-                    "content": self.SYSTEM_PROMPT
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": "Analyze this failed 3D print and provide diagnosis in JSON format."
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:{mime_type};base64,{image_data}",
-                                "detail": "high"
-                            }
-                        }
-                    ]
-                }
-            ],
-            "max_tokens": 1500,
-            "temperature": 0.3
-        }
+        # Only the image varies between requests
+        body = io.BytesIO()
+        body.write(self._PAYLOAD_HEAD)
+        self._encode_image(image_path, body)
+        body.write(self._PAYLOAD_TAIL)
+        body.seek(0)
         
         # Make API call
         try:
-            response = requests.post(
-                self.API_URL,
-                headers=headers,
-                json=payload,
-                timeout=60
-            )
+            response = self._session.post(self.API_URL, data=body, timeout=60)
             response.raise_for_status()
             
-            result = response.json()
+            result = _loads(response.content)
             content = result["choices"][0]["message"]["content"]
             
-            # Parse JSON response
-            # Sometimes GPT wraps JSON in markdown code blocks
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-            
-            data = json.loads(content)
-            
-            # Convert to CSIDiagnosis
-            findings = [
-                CSIFinding(
-                    issue_type=f.get("issue_type", "unknown"),
-                    severity=f.get("severity", "minor"),
-                    description=f.get("description", ""),
-                    location=f.get("location"),
-                    confidence=f.get("confidence", 0.5)
-                )
-                for f in data.get("findings", [])
-            ]
-            
-            return CSIDiagnosis(
-                primary_issue=data.get("primary_issue", "unknown"),
-                summary=data.get("summary", "No summary available"),
-                findings=findings,
-                root_cause=data.get("root_cause", "Unknown"),
-                suggested_fixes=data.get("suggested_fixes", []),
-                prevention_tips=data.get("prevention_tips", []),
-                confidence_score=data.get("confidence_score", 0.5)
-            )
+            data = _parse_answer(content)
+            diagnosis = self._to_diagnosis(data)
+            _cache.put(cache_key, data)
+            return diagnosis
             
         except requests.exceptions.Timeout:
             raise RuntimeError("Analysis timed out. Try again with a smaller image.")
@@ -223,6 +243,53 @@ Be thorough but concise. Use your knowledge of resin printing physics and common
         except json.JSONDecodeError as e:
             raise RuntimeError(f"Failed to parse analysis result: {e}")
     
+    def _to_diagnosis(self, data: dict) -> CSIDiagnosis:
+        """Convert the model's JSON answer to a CSIDiagnosis."""
+        findings = [
+            CSIFinding(
+                issue_type=f.get("issue_type", "unknown"),
+                severity=f.get("severity", "minor"),
+                description=f.get("description", ""),
+                location=f.get("location"),
+                confidence=f.get("confidence", 0.5)
+            )
+            for f in data.get("findings", [])
+        ]
+        
+        return CSIDiagnosis(
+            primary_issue=data.get("primary_issue", "unknown"),
+            summary=data.get("summary", "No summary available"),
+            findings=findings,
+            root_cause=data.get("root_cause", "Unknown"),
+            suggested_fixes=data.get("suggested_fixes", []),
+            prevention_tips=data.get("prevention_tips", []),
+            confidence_score=data.get("confidence_score", 0.5)
+        )
+    
+    def _encode_image(self, path: Path, out: io.BytesIO) -> None:
+        """Write the image to out as a base64 data URL, downscaling large photos."""
+        size = path.stat().st_size
+        if size > MAX_UPLOAD_BYTES and HAS_PIL:
+            try:
+                with Image.open(path) as img:
+                    img.thumbnail((MAX_IMAGE_EDGE, MAX_IMAGE_EDGE))
+                    buf = io.BytesIO()
+                    img.convert("RGB").save(buf, format="JPEG", quality=85)
+            except OSError:
+                pass  # Not something Pillow can read - send the file as is
+            else:
+                out.write(b"data:image/jpeg;base64,")
+                _b64_into(buf.getbuffer(), out)
+                return
+        
+        out.write(f"data:{self._get_mime_type(path)};base64,".encode())
+        if not size:
+            return
+        # Encode straight from the page cache, no intermediate bytes copy
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                _b64_into(mm, out)
+    
     def _get_mime_type(self, path: Path) -> str:
         """Determine MIME type from file extension."""
         ext = path.suffix.lower()
@@ -244,12 +311,7 @@ Be thorough but concise. Use your knowledge of resin printing physics and common
             diagnosis = self.analyze(image_path)
             
             # Format brief response
-            emoji = {
-                "critical": "🚨",
-                "major": "⚠️",
-                "minor": "🔶",
-                "cosmetic": "🔧"
-            }.get(diagnosis.findings[0].severity if diagnosis.findings else "minor", "🔍")
+            emoji = SEVERITY_EMOJI.get(diagnosis.findings[0].severity if diagnosis.findings else "minor", "🔍")
             
             response = f"""{emoji} *CSI Analysis*
 
@@ -270,10 +332,56 @@ Be thorough but concise. Use your knowledge of resin printing physics and common
             return f"❌ Analysis failed: {str(e)}"
 
 
+def _parse_answer(content: str) -> dict:
+    """Parse the model's JSON answer, unwrapping a code block only if needed."""
+    try:
+        return _loads(content)
+    except json.JSONDecodeError:
+        match = _FENCE_RE.search(content)
+        if match is None:
+            raise
+        return _loads(match.group(1))
+
+
+def _b64_into(data, out: io.BytesIO) -> None:
+    """Base64-encode data into out chunk by chunk, without a whole-image copy."""
+    with memoryview(data) as view:
+        for start in range(0, len(view), B64_CHUNK):
+            out.write(base64.b64encode(view[start:start + B64_CHUNK]))
+
+
 # ============================================================================
 # Command Handlers
 # ============================================================================
 
+@functools.lru_cache(maxsize=4)
+def _analyzer(api_key: str | None) -> CSIAnalyzer:
+    """Shared analyzer per API key, so its connection stays warm between commands."""
+    return CSIAnalyzer(api_key)
+
+
+CSI_REPORT = (
+    "🔍 *CSI: Print Crime Scene Investigation*\n\n"
+    "*Primary Issue:* {issue}\n"
+    "*Confidence:* {confidence:.0%}\n\n"
+    "*Summary:*\n{summary}\n\n"
+    "*Findings:*\n"
+    "{findings}"
+    "*Root Cause:*\n{root_cause}\n\n"
+    "*Suggested Fixes:*{fixes}\n\n"
+    "*Prevention Tips:*{tips}"
+)
+
+
+def _format_finding(finding: CSIFinding) -> str:
+    """One finding of the /csi report, with its trailing blank line."""
+    location = f"   Location: {finding.location}\n" if finding.location else ""
+    return (
+        f"{SEVERITY_EMOJI.get(finding.severity, '🔍')} {finding.description}\n"
+        f"{location}   Confidence: {finding.confidence:.0%}\n\n"
+    )
+
+
 def cmd_csi(image_path: str, api_key: str | None = None) -> str:
     """
     Handle /csi command - full analysis report.
@@ -283,45 +391,22 @@ def cmd_csi(image_path: str, api_key: str | None = None) -> str:
         api_key: OpenAI API key (optional, reads from env)
     """
     try:
-        analyzer = CSIAnalyzer(api_key)
+        analyzer = _analyzer(api_key)
         diagnosis = analyzer.analyze(image_path)
         
-        # Build detailed report
-        lines = [
-            "🔍 *CSI: Print Crime Scene Investigation*\n",
-            f"*Primary Issue:* {diagnosis.primary_issue.replace('_', ' ').title()}",
-            f"*Confidence:* {diagnosis.confidence_score:.0%}\n",
-            f"*Summary:*\n{diagnosis.summary}\n",
-            "*Findings:*"
-        ]
-        
-        for finding in diagnosis.findings[:3]:  # Top 3
-            emoji = {"critical": "🚨", "major": "⚠️", "minor": "🔶", "cosmetic": "🔧"}.get(
-                finding.severity, "🔍"
-            )
-            lines.append(f"{emoji} {finding.description}")
-            if finding.location:
-                lines.append(f"   Location: {finding.location}")
-            lines.append(f"   Confidence: {finding.confidence:.0%}")
-            lines.append("")
-        
-        lines.extend([
-            f"*Root Cause:*\n{diagnosis.root_cause}\n",
-            "*Suggested Fixes:*"
-        ])
-        
-        for i, fix in enumerate(diagnosis.suggested_fixes[:3], 1):
-            action = fix.get("action", "Unknown fix")
-            details = fix.get("details", "")
-            lines.append(f"{i}. {action}")
-            if details:
-                lines.append(f"   {details}")
-        
-        lines.extend(["", "*Prevention Tips:*"])
-        for tip in diagnosis.prevention_tips[:3]:
-            lines.append(f"• {tip}")
-        
-        return "\n".join(lines)
+        return CSI_REPORT.format(
+            issue=diagnosis.primary_issue.replace('_', ' ').title(),
+            confidence=diagnosis.confidence_score,
+            summary=diagnosis.summary,
+            findings="".join(_format_finding(f) for f in diagnosis.findings[:3]),  # Top 3
+            root_cause=diagnosis.root_cause,
+            fixes="".join(
+                f"\n{i}. {fix.get('action', 'Unknown fix')}"
+                + (f"\n   {fix['details']}" if fix.get("details") else "")
+                for i, fix in enumerate(diagnosis.suggested_fixes[:3], 1)
+            ),
+            tips="".join(f"\n• {tip}" for tip in diagnosis.prevention_tips[:3]),
+        )
         
     except FileNotFoundError:
         return "❌ Image file not found. Please upload a photo first."
@@ -342,7 +427,7 @@ def cmd_analyze(image_path: str, api_key: str | None = None) -> str:
         api_key: OpenAI API key (optional, reads from env)
     """
     try:
-        analyzer = CSIAnalyzer(api_key)
+        analyzer = _analyzer(api_key)
         return analyzer.quick_check(image_path)
     except Exception as e:
         return f"❌ Analysis failed: {str(e)}"
@@ -355,94 +440,101 @@ def cmd_analyze(image_path: str, api_key: str | None = None) -> str:
 ISSUE_DESCRIPTIONS = {
     "support_failure": {
         "description": "Support structures detached or failed to hold the part",
-        "common_causes": ["Insufficient support density", "Weak support tips", "High peel forces"],
-        "fixes": [
+        "common_causes": ("Insufficient support density", "Weak support tips", "High peel forces"),
+        "fixes": (
             "Increase support density to 70-80%",
             "Use heavier support type",
             "Add supports to all overhangs >45°",
             "Increase support tip diameter"
-        ]
+        )
     },
     "layer_shift": {
         "description": "Layers misaligned or shifted horizontally",
-        "common_causes": ["Build platform loose", "Resin tank issues", "High peel forces"],
-        "fixes": [
+        "common_causes": ("Build platform loose", "Resin tank issues", "High peel forces"),
+        "fixes": (
             "Relevel build platform",
             "Check resin tank for debris",
             "Reduce layer exposure time",
             "Increase wait time between layers"
-        ]
+        )
     },
     "warping": {
         "description": "Corners curled up or part deformed",
-        "common_causes": ["Uneven shrinkage", "Insufficient supports on base", "High stress"],
-        "fixes": [
+        "common_causes": ("Uneven shrinkage", "Insufficient supports on base", "High stress"),
+        "fixes": (
             "Add supports to base edges",
             "Reorient part to reduce overhang",
             "Increase base layer count",
             "Use Tough resin for large parts"
-        ]
+        )
     },
     "resin_contamination": {
         "description": "Cloudy areas, particulates, or discoloration",
-        "common_causes": ["Dirty resin tank", "Contaminated resin", "Failed print debris"],
-        "fixes": [
+        "common_causes": ("Dirty resin tank", "Contaminated resin", "Failed print debris"),
+        "fixes": (
             "Clean resin tank thoroughly",
             "Filter resin through paint strainer",
             "Replace resin if heavily contaminated",
             "Clean build platform"
-        ]
+        )
     },
     "under_exposure": {
         "description": "Soft, incomplete, or missing features",
-        "common_causes": ["Insufficient exposure time", "Weak light source", "Wrong material settings"],
-        "fixes": [
+        "common_causes": ("Insufficient exposure time", "Weak light source", "Wrong material settings"),
+        "fixes": (
             "Increase exposure time by 20%",
             "Check resin is not expired",
             "Verify material profile is correct",
             "Clean optical window"
-        ]
+        )
     },
     "over_exposure": {
         "description": "Bulging features, fused details, elephant foot",
-        "common_causes": ["Too much exposure", "High power setting", "Longer light-on time"],
-        "fixes": [
+        "common_causes": ("Too much exposure", "High power setting", "Longer light-on time"),
+        "fixes": (
             "Reduce exposure time by 15%",
             "Enable anti-aliasing",
             "Lower light intensity if adjustable",
             "Use grayscale calibration"
-        ]
+        )
     },
     "peel_force_damage": {
         "description": "Tears, delamination, or Z-axis artifacts",
-        "common_causes": ["High peel forces", "Large surface area", "Fast peel speed"],
-        "fixes": [
+        "common_causes": ("High peel forces", "Large surface area", "Fast peel speed"),
+        "fixes": (
             "Reduce peel speed",
             "Increase lift height",
             "Add drain holes to hollow parts",
             "Orient to minimize cross-section"
-        ]
+        )
     },
     "incomplete_print": {
         "description": "Print stopped before completion",
-        "common_causes": ["Power failure", "Out of resin", "Hardware error"],
-        "fixes": [
+        "common_causes": ("Power failure", "Out of resin", "Hardware error"),
+        "fixes": (
             "Check resin level before printing",
             "Ensure stable power supply",
             "Check for error messages on printer",
             "Reduce print time with faster settings"
-        ]
+        )
     }
 }
 
+# Read-only: callers get shared views, not copies they could mutate
+ISSUE_DESCRIPTIONS = MappingProxyType(
+    {issue: MappingProxyType(info) for issue, info in ISSUE_DESCRIPTIONS.items()}
+)
+
+_UNKNOWN_ISSUE = MappingProxyType({
+    "description": "Unknown issue type",
+    "common_causes": (),
+    "fixes": ()
+})
+
 
-def get_issue_info(issue_type: str) -> dict:
+def get_issue_info(issue_type: str) -> Mapping:
     """Get information about a specific issue type."""
-    return ISSUE_DESCRIPTIONS.get(issue_type, {
-        "description": "Unknown issue type",
-        "common_causes": [],
-        "fixes": []
-    })
+    return ISSUE_DESCRIPTIONS.get(issue_type, _UNKNOWN_ISSUE)
 
 
 # ============================================================================
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Content-addressed disk caches for Kim Formlabs Bot
+Small, size-bounded result caches keyed by file content hash, all kept
+under one cache root.
+"""
+
+import hashlib
+import mmap
+import os
+from pathlib import Path
+
+CACHE_ROOT = Path(os.environ.get("KIM_CACHE_DIR", "~/.cache/kim-formlabs")).expanduser()
+
+
+def file_digest(path) -> str:
+    """Content hash (BLAKE2b, 16 bytes) of a file, read through mmap."""
+    with open(path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            return hashlib.blake2b(digest_size=16).hexdigest()  # mmap refuses empty files
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return hashlib.blake2b(mm, digest_size=16).hexdigest()
+
+
+class DiskCache:
+    """One file per key under CACHE_ROOT/name, least recently used beyond max_entries dropped.
+
+    Best effort: unreadable entries are misses and write errors are ignored.
+    """
+
+    def __init__(self, name: str, ext: str, max_entries: int, dumps, loads):
+        self.directory = CACHE_ROOT / name
+        self.ext = ext
+        self.max_entries = max_entries
+        self._dumps = dumps
+        self._loads = loads
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.ext}"
+
+    def get(self, key: str):
+        """Cached value for key, or None."""
+        path = self._path(key)
+        try:
+            value = self._loads(path.read_bytes())
+            os.utime(path)  # mark as recently used
+            return value
+        except Exception:  # missing, unreadable, or written by an older format
+            return None
+
+    def put(self, key: str, value) -> None:
+        """Store value under key, evicting the least recently used entries."""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_bytes(self._dumps(value))
+            os.replace(tmp, path)
+
+            entries = list(self.directory.glob(f"*{self.ext}"))
+            if len(entries) > self.max_entries:
+                entries.sort(key=lambda p: p.stat().st_mtime)
+                for old in entries[:len(entries) - self.max_entries]:
+                    old.unlink(missing_ok=True)
+        except OSError:
+            pass
@@ -9,32 +9,88 @@ Author: Kim (OpenClaw)
 
 from __future__ import annotations
 
+import copy
 import os
+import pickle
 import re
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Literal
+from typing import Literal, NamedTuple
 
-# Optional imports - handle gracefully if not available
-try:
-    import trimesh
-    HAS_TRIMESH = True
-except ImportError:
-    HAS_TRIMESH = False
+from cachetools import LRUCache
 
-try:
-    import numpy as np
-    HAS_NUMPY = True
-except ImportError:
-    HAS_NUMPY = False
+from disk_cache import DiskCache, file_digest
 
-try:
-    from scipy.spatial import ConvexHull
-    from scipy.cluster.hierarchy import fcluster, linkage
-    HAS_SCIPY = True
-except ImportError:
-    HAS_SCIPY = False
+# Optional imports - loaded on first use by the _require_* helpers below, so
+# importing this module (e.g. for StandardLibrary) doesn't pay for trimesh,
+# numpy and scipy. None means "not tried yet".
+trimesh = None
+HAS_TRIMESH = None
+
+np = None
+HAS_NUMPY = None
+
+numba = None
+HAS_NUMBA = None
+
+ConvexHull = fcluster = linkage = None
+HAS_SCIPY = None
+
+
+def _require_trimesh() -> bool:
+    """Import trimesh on first use; return whether it is available."""
+    global trimesh, HAS_TRIMESH
+    if HAS_TRIMESH is None:
+        try:
+            import trimesh as _trimesh
+            trimesh = _trimesh
+            HAS_TRIMESH = True
+        except ImportError:
+            HAS_TRIMESH = False
+    return HAS_TRIMESH
+
+
+def _require_numpy() -> bool:
+    """Import numpy on first use; return whether it is available."""
+    global np, HAS_NUMPY
+    if HAS_NUMPY is None:
+        try:
+            import numpy as _np
+            np = _np
+            HAS_NUMPY = True
+        except ImportError:
+            HAS_NUMPY = False
+    return HAS_NUMPY
+
+
+def _require_numba() -> bool:
+    """Import numba and compile the flat-surface kernel on first use."""
+    global numba, HAS_NUMBA, _flat_surface_sums_jit
+    if HAS_NUMBA is None:
+        try:
+            import numba as _numba
+            numba = _numba
+            HAS_NUMBA = True
+            _flat_surface_sums_jit = numba.njit(cache=True, fastmath=True)(_flat_surface_sums)
+        except ImportError:
+            HAS_NUMBA = False
+    return HAS_NUMBA
+
+
+def _require_scipy() -> bool:
+    """Import the scipy pieces used for clustering on first use."""
+    global ConvexHull, fcluster, linkage, HAS_SCIPY
+    if HAS_SCIPY is None:
+        try:
+            from scipy.spatial import ConvexHull
+            from scipy.cluster.hierarchy import fcluster, linkage
+            HAS_SCIPY = True
+        except ImportError:
+            HAS_SCIPY = False
+    return HAS_SCIPY
 
 
 # ============================================================================
@@ -70,6 +126,15 @@ class FixtureConfig:
                 raise ValueError(f"{name} must be positive, got {value}")
 
 
+class FlatSurface(NamedTuple):
+    """A large flat surface facing one of the axis directions."""
+    name: str  # "top", "bottom", "front", "back", "left", "right"
+    normal: tuple[int, int, int]
+    area: float  # mm²
+    center: tuple[float, float, float]
+    face_count: int
+
+
 @dataclass
 class AnalysisResult:
     """Result from analyzing a custom STL file."""
@@ -77,12 +142,12 @@ class AnalysisResult:
     dimensions: tuple[float, float, float]  # (x, y, z)
     center_of_mass: tuple[float, float, float]
     volume: float
-    flat_surfaces: list[dict]  # List of {normal: (x,y,z), area: float, center: (x,y,z)}
+    flat_surfaces: list[FlatSurface]  # Largest first
     grip_points: list[tuple[float, float, float]]
     bounding_box: tuple[tuple[float, float, float], tuple[float, float, float]]  # min, max
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class FlatSurfaceCluster:
     """A cluster of co-planar faces forming a flat surface."""
     normal: tuple[float, float, float]
@@ -196,22 +261,48 @@ class StandardLibrary:
         ),
     }
     
+    # Search columns, built once: keys and lowercased names side by side
+    _KEYS = tuple(LIBRARY)
+    _NAMES_LOWER = tuple(obj.name.lower() for obj in LIBRARY.values())
+    _KEY_SEPARATORS = str.maketrans(" -", "__")
+    
     @classmethod
     def get(cls, key: str) -> ObjectDimensions | None:
         """Get object dimensions by key."""
         # Normalize key
-        key = key.lower().replace(" ", "_").replace("-", "_")
-        return cls.LIBRARY.get(key)
+        return cls.LIBRARY.get(key.lower().translate(cls._KEY_SEPARATORS))
+    
+    _TRIGRAMS: dict[str, set[int]] | None = None  # trigram -> entry indices, built on first search
     
     @classmethod
     def search(cls, query: str) -> list[tuple[str, ObjectDimensions]]:
         """Search for objects matching query."""
         query = query.lower()
-        results = []
-        for key, obj in cls.LIBRARY.items():
-            if query in key or query in obj.name.lower():
-                results.append((key, obj))
-        return results
+        if len(query) < 3:
+            candidates = range(len(cls._KEYS))
+        else:
+            # Only entries containing every trigram of the query can match
+            trigrams = cls._trigram_index()
+            postings = [trigrams.get(query[i:i + 3], set()) for i in range(len(query) - 2)]
+            candidates = sorted(set.intersection(*postings))
+        
+        return [
+            (cls._KEYS[i], cls.LIBRARY[cls._KEYS[i]])
+            for i in candidates
+            if query in cls._KEYS[i] or query in cls._NAMES_LOWER[i]
+        ]
+    
+    @classmethod
+    def _trigram_index(cls) -> dict[str, set[int]]:
+        """Build (once) the trigram index over keys and lowercased names."""
+        if cls._TRIGRAMS is None:
+            index: dict[str, set[int]] = {}
+            for i, text in enumerate(zip(cls._KEYS, cls._NAMES_LOWER)):
+                for part in text:
+                    for j in range(len(part) - 2):
+                        index.setdefault(part[j:j + 3], set()).add(i)
+            cls._TRIGRAMS = index
+        return cls._TRIGRAMS
     
     @classmethod
     def list_all(cls) -> list[str]:
@@ -223,22 +314,110 @@ class StandardLibrary:
 # Mesh Analyzer
 # ============================================================================
 
+# Axis directions checked for flat surfaces
+FLAT_DIRECTIONS = {
+    "top": (0, 0, 1),
+    "bottom": (0, 0, -1),
+    "front": (0, -1, 0),
+    "back": (0, 1, 0),
+    "left": (-1, 0, 0),
+    "right": (1, 0, 0),
+}
+FLAT_THRESHOLD = 0.95  # Normal within ~18 degrees of the direction
+
+# Analyses are cached by STL content hash - users re-upload the same part
+# while iterating on fixture options. Recent results stay in memory; the
+# on-disk copies (least recently used beyond MESH_CACHE_MAX_ENTRIES are
+# dropped) survive restarts.
+MESH_CACHE_MAX_ENTRIES = 200
+MESH_CACHE_FORMAT = 2  # bump when AnalysisResult changes shape
+_analysis_cache = LRUCache(maxsize=64)
+_disk_cache = DiskCache("mesh", ".pkl", MESH_CACHE_MAX_ENTRIES, dumps=pickle.dumps, loads=pickle.loads)
+_analysis_lock = threading.Lock()
+
+
+def _cached_analysis(digest: str) -> AnalysisResult | None:
+    """Cached analysis for a file hash, from memory or disk, or None."""
+    with _analysis_lock:
+        result = _analysis_cache.get(digest)
+    if result is not None:
+        return result
+    
+    result = _disk_cache.get(f"{digest}.v{MESH_CACHE_FORMAT}")
+    if result is None:
+        return None
+    with _analysis_lock:
+        _analysis_cache[digest] = result
+    return result
+
+
+def _store_analysis(digest: str, result: AnalysisResult) -> None:
+    """Cache an analysis in memory and on disk."""
+    with _analysis_lock:
+        _analysis_cache[digest] = result
+    _disk_cache.put(f"{digest}.v{MESH_CACHE_FORMAT}", result)
+
+
+def _flat_surface_sums(normals, areas, centroids, targets, threshold):
+    """Per-direction (total area, centroid sum, face count) in one pass over the faces.
+    
+    Compiled with numba when it is installed; the plain-Python version is
+    only used to check the kernel - without numba, _flat_surface_sums_numpy
+    does the work.
+    """
+    n_dirs = targets.shape[0]
+    total_area = np.zeros(n_dirs)
+    center_sum = np.zeros((n_dirs, 3))
+    count = np.zeros(n_dirs, dtype=np.int64)
+    for i in range(normals.shape[0]):
+        nx, ny, nz = normals[i, 0], normals[i, 1], normals[i, 2]
+        for k in range(n_dirs):
+            if nx * targets[k, 0] + ny * targets[k, 1] + nz * targets[k, 2] > threshold:
+                total_area[k] += areas[i]
+                center_sum[k, 0] += centroids[i, 0]
+                center_sum[k, 1] += centroids[i, 1]
+                center_sum[k, 2] += centroids[i, 2]
+                count[k] += 1
+    return total_area, center_sum, count
+
+
+def _flat_surface_sums_numpy(normals, areas, centroids, targets, threshold):
+    """NumPy equivalent of _flat_surface_sums: one matmul for all directions."""
+    aligned = (normals @ targets.T > threshold).astype(normals.dtype)  # (faces, directions)
+    return areas @ aligned, aligned.T @ centroids, np.count_nonzero(aligned, axis=0)
+
+
+_flat_surface_sums_jit = None  # compiled by _require_numba
+
+
 class MeshAnalyzer:
     """Analyze custom STL files to extract geometry information."""
     
     def __init__(self):
-        if not HAS_TRIMESH:
+        if not _require_trimesh():
             raise ImportError("trimesh is required for mesh analysis. Install with: pip install trimesh")
-        if not HAS_NUMPY:
+        if not _require_numpy():
             raise ImportError("numpy is required for mesh analysis. Install with: pip install numpy")
+        _require_numba()
     
-    def analyze(self, filepath: str | Path) -> AnalysisResult:
-        """Analyze an STL file and extract key features."""
+    def analyze(self, filepath: str | Path, *, full: bool = True) -> AnalysisResult:
+        """Analyze an STL file and extract key features.
+        
+        With full=False the volume and center-of-mass integrals are skipped:
+        volume is 0.0 and the center of mass is the bounding box center.
+        """
         filepath = Path(filepath)
         
         if not filepath.exists():
             raise FileNotFoundError(f"File not found: {filepath}")
         
+        digest = file_digest(filepath) + ("" if full else "-quick")
+        cached = _cached_analysis(digest)
+        if cached is not None:
+            result = copy.deepcopy(cached)
+            result.filename = filepath.name
+            return result
+        
         # Load mesh
         mesh = trimesh.load_mesh(filepath)
 
@@ -251,24 +430,35 @@ class MeshAnalyzer:
         dimensions = tuple(bounds[1] - bounds[0])
 
         # Center of mass (may fail for non-watertight meshes)
-        try:
-            com = tuple(mesh.center_mass)
-        except Exception:
+        com = None
+        if full:
+            try:
+                com = tuple(mesh.center_mass)
+            except Exception:
+                pass
+        if com is None:
             com = tuple(np.mean(bounds, axis=0))
 
         # Volume (may fail for non-watertight meshes)
-        try:
-            volume = float(mesh.volume)
-        except Exception:
-            volume = 0.0
+        volume = 0.0
+        if full:
+            try:
+                volume = float(mesh.volume)
+            except Exception:
+                pass
         
-        # Find flat surfaces (faces with similar normals)
-        flat_surfaces = self._find_flat_surfaces(mesh)
+        # Find flat surfaces (faces with similar normals) - float32 is plenty
+        # for a 0.95 threshold and halves the memory the reduction streams
+        flat_surfaces = self._find_flat_surfaces(
+            np.ascontiguousarray(mesh.face_normals, dtype=np.float32),
+            np.ascontiguousarray(mesh.area_faces, dtype=np.float32),
+            np.ascontiguousarray(mesh.triangles_center, dtype=np.float32),
+        )
         
         # Calculate grip points (center of mass projected to surfaces)
         grip_points = self._calculate_grip_points(mesh, com, flat_surfaces)
         
-        return AnalysisResult(
+        result = AnalysisResult(
             filename=filepath.name,
             dimensions=dimensions,
             center_of_mass=com,
@@ -277,55 +467,45 @@ class MeshAnalyzer:
             grip_points=grip_points,
             bounding_box=(tuple(bounds[0]), tuple(bounds[1]))
         )
+        _store_analysis(digest, copy.deepcopy(result))
+        return result
     
-    def _find_flat_surfaces(self, mesh: trimesh.Trimesh) -> list[dict]:
-        """Find large flat surfaces on the mesh."""
+    def _find_flat_surfaces(self, normals: np.ndarray, areas: np.ndarray, centroids: np.ndarray) -> list[FlatSurface]:
+        """Find large flat surfaces from a mesh's face normals, areas and centroids."""
+        # analyze() hands over C-contiguous float32 so the matmul below is one SGEMM
+        assert normals.flags['C_CONTIGUOUS'], "normals must be C-contiguous"
         surfaces = []
         
-        # Get face normals and areas
-        normals = mesh.face_normals
-        areas = mesh.area_faces
-        centroids = mesh.triangles_center
-        
         # Group faces by similar normal direction
-        directions = {
-            "top": [0, 0, 1],
-            "bottom": [0, 0, -1],
-            "front": [0, -1, 0],
-            "back": [0, 1, 0],
-            "left": [-1, 0, 0],
-            "right": [1, 0, 0],
-        }
+        targets = np.array(list(FLAT_DIRECTIONS.values()), dtype=normals.dtype)
+        if _flat_surface_sums_jit is not None:
+            total_area, center_sum, count = _flat_surface_sums_jit(
+                normals, areas, centroids, targets, FLAT_THRESHOLD
+            )
+        else:
+            total_area, center_sum, count = _flat_surface_sums_numpy(
+                normals, areas, centroids, targets, FLAT_THRESHOLD
+            )
         
-        for name, target_normal in directions.items():
-            # Find faces with normals aligned to target
-            dot_products = np.dot(normals, target_normal)
-            aligned_faces = dot_products > 0.95  # Within ~18 degrees
-            
-            if np.any(aligned_faces):
-                total_area = np.sum(areas[aligned_faces])
-                if total_area > 10:  # Minimum 10mm²
-                    # Calculate average center
-                    centers = centroids[aligned_faces]
-                    avg_center = tuple(np.mean(centers, axis=0))
-                    
-                    surfaces.append({
-                        "name": name,
-                        "normal": tuple(target_normal),
-                        "area": float(total_area),
-                        "center": avg_center,
-                        "face_count": int(np.sum(aligned_faces))
-                    })
+        for k, (name, target_normal) in enumerate(FLAT_DIRECTIONS.items()):
+            if count[k] and total_area[k] > 10:  # Minimum 10mm²
+                surfaces.append(FlatSurface(
+                    name,
+                    target_normal,
+                    float(total_area[k]),
+                    tuple(float(c) for c in center_sum[k] / count[k]),
+                    int(count[k])
+                ))
         
         # Sort by area (largest first)
-        surfaces.sort(key=lambda x: x["area"], reverse=True)
+        surfaces.sort(key=lambda x: x.area, reverse=True)
         return surfaces
     
     def _calculate_grip_points(
         self, 
         mesh: trimesh.Trimesh, 
         center_of_mass: tuple,
-        flat_surfaces: list[dict]
+        flat_surfaces: list[FlatSurface]
     ) -> list[tuple[float, float, float]]:
         """Calculate optimal grip point locations."""
         grip_points = []
@@ -336,8 +516,8 @@ class MeshAnalyzer:
         # Add points from flat surfaces
         for surface in flat_surfaces[:3]:  # Top 3 surfaces
             # Offset from surface center toward interior
-            normal = np.array(surface["normal"])
-            center = np.array(surface["center"])
+            normal = np.array(surface.normal)
+            center = np.array(surface.center)
             
             # Move 2mm inward from surface
             grip_point = tuple(center - normal * 2)
@@ -365,7 +545,7 @@ class MeshAnalyzer:
         Returns:
             List of FlatSurfaceCluster sorted by area descending.
         """
-        if not HAS_SCIPY:
+        if not _require_scipy():
             raise ImportError("scipy is required for clustering. Install with: pip install scipy")
 
         normals = mesh.face_normals
@@ -575,6 +755,10 @@ class MeshAnalyzer:
 # Fixture Generator
 # ============================================================================
 
+# Characters that can't appear in a name embedded in OpenSCAD code
+_UNSAFE_NAME_RE = re.compile(r'[^a-zA-Z0-9_\- ]')
+
+
 class FixtureGenerator:
     """Generate OpenSCAD code for fixtures."""
     
@@ -591,7 +775,7 @@ class FixtureGenerator:
         """Generate OpenSCAD code for a fixture."""
         
         # Sanitize name for OpenSCAD (replace special chars with underscores)
-        name = re.sub(r'[^a-zA-Z0-9_\- ]', '_', name)
+        name = _UNSAFE_NAME_RE.sub('_', name)
 
         if isinstance(obj, ObjectDimensions):
             dims = (obj.length, obj.width, obj.height)
@@ -600,7 +784,7 @@ class FixtureGenerator:
         else:
             dims = obj.dimensions
             grip_points = obj.grip_points
-            flat_surfaces = [s["name"] for s in obj.flat_surfaces]
+            flat_surfaces = [s.name for s in obj.flat_surfaces]
 
         length, width, height = dims
 
@@ -613,10 +797,16 @@ class FixtureGenerator:
             flat_surfaces=flat_surfaces
         )
         
-        # Save to file
+        # Save to file - one small string, so skip the buffered text layer
         output_path = self.output_dir / f"{name}.scad"
-        with open(output_path, 'w') as f:
-            f.write(scad)
+        data = scad.encode('utf-8')
+        fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
         
         return str(output_path)
     
@@ -635,12 +825,9 @@ class FixtureGenerator:
         base_h = config.base_height
         clearance = config.clearance
         
-        # Calculate fixture dimensions
-        fx = length + wall * 2 + clearance * 2
-        fy = width + wall * 2 + clearance * 2
-        fz = height + base_h + wall
-        
-        # Generate SCAD code
+        # Generate SCAD code - the totals are derived in OpenSCAD itself. Kept
+        # as an f-string: its format specs compile to bytecode, where a
+        # str.format template would be re-parsed on every call.
         scad = f'''// Fixture for: {name}
 // Generated by Kim Formlabs Bot
 // Operation: {config.operation}
@@ -723,6 +910,18 @@ fixture();
             raise RuntimeError("OpenSCAD not found. Install with: brew install openscad")
         except subprocess.TimeoutExpired:
             raise RuntimeError("OpenSCAD rendering timed out")
+    
+    def render_stl_batch(self, scad_paths: list[str | Path]) -> list[str]:
+        """Render several OpenSCAD files to STL, in order.
+        
+        The OpenSCAD CLI writes one output per process, so a batch can't share
+        a process; the renders run side by side instead, one per CPU core.
+        """
+        if not scad_paths:
+            return []
+        workers = min(len(scad_paths), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="openscad") as pool:
+            return list(pool.map(self.render_stl, scad_paths))
 
 
 # ============================================================================
@@ -765,14 +964,15 @@ def generate_fixture(
     
     if target_path.exists() and target_path.suffix.lower() in ['.stl', '.obj']:
         # Custom STL file
-        if not HAS_TRIMESH:
+        if not _require_trimesh():
             return {
                 "success": False,
                 "error": "trimesh required for STL analysis. Install: pip install trimesh"
             }
         
+        # Fixtures only need the part's extent and flat faces
         analyzer = MeshAnalyzer()
-        obj = analyzer.analyze(target_path)
+        obj = analyzer.analyze(target_path, full=False)
         name = target_path.stem + "_fixture"
         
     else:
@@ -861,7 +1061,7 @@ if __name__ == "__main__":
     # ------------------------------------------------------------------
     # Example 4: Advanced mesh analysis on a simple box
     # ------------------------------------------------------------------
-    if HAS_TRIMESH and HAS_NUMPY and HAS_SCIPY:
+    if _require_trimesh() and _require_numpy() and _require_scipy():
         print("\n--- Advanced Mesh Analysis (box 40x30x20) ---")
         box = trimesh.primitives.Box(extents=[40, 30, 20])
         mesh = box.to_mesh()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Per-user rate limiting for Kim Formlabs Bot commands
+Token buckets keyed by Telegram user ID.
+"""
+
+import asyncio
+import functools
+import inspect
+import threading
+import time
+
+from cachetools import TTLCache
+
+
+class TokenBucket:
+    """Token bucket per user: `burst` commands at once, refilled at `rate` per second."""
+
+    def __init__(self, rate: float = 0.5, burst: int = 5):
+        self.rate = rate
+        self.burst = burst
+        self._state: dict[int, tuple[float, float]] = {}  # user_id -> (tokens, last_ts)
+        self._lock = threading.Lock()
+
+    def allow(self, user_id: int, cost: float = 1) -> float:
+        """Take `cost` tokens. Returns 0 if allowed, else seconds until the next token.
+        
+        A cost above the remaining tokens is still allowed while at least one
+        is left; the bucket goes into debt and later calls wait it off.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._state.get(user_id, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                self._state[user_id] = (tokens - cost, now)
+                return 0.0
+            self._state[user_id] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+    def reset(self):
+        with self._lock:
+            self._state.clear()
+
+
+# Regular commands (API lookups, status) share one budget per user
+DEFAULT = TokenBucket(rate=0.5, burst=5)
+# Expensive commands: fixture generation, CSI image analysis
+HEAVY = TokenBucket(rate=1 / 30, burst=2)
+
+
+# Outgoing messages: Telegram allows about one message a second per chat and
+# 30 a second overall. Each 4096-character part of a reply costs one token.
+SEND_PER_CHAT = TokenBucket(rate=1.0, burst=1)
+SEND_GLOBAL = TokenBucket(rate=25.0, burst=30)
+MESSAGE_PART = 4096
+
+
+async def send_slot(chat_id: int, text: str = "", edit: bool = False) -> None:
+    """Wait until a reply of this size may be sent to chat_id.
+    
+    An edit of a message the bot just sent (a placeholder) was already paid
+    for in the chat's budget, so it only counts against the global one.
+    """
+    cost = max(1, -(-len(text) // MESSAGE_PART))
+    buckets = ((SEND_GLOBAL, 0),) if edit else ((SEND_PER_CHAT, chat_id), (SEND_GLOBAL, 0))
+    for bucket, key in buckets:
+        while wait := bucket.allow(key, cost):
+            await asyncio.sleep(wait)
+
+
+def rate_limit_message(wait: float) -> str:
+    return f"⏳ Rate limit, try again in {max(wait, 1):.0f}s."
+
+
+def rate_limited(bucket: TokenBucket = DEFAULT):
+    """Decorate a cmd_* handler whose first argument is the Telegram user ID."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(telegram_user_id: int, *args, **kwargs):
+                wait = bucket.allow(telegram_user_id)
+                if wait:
+                    return rate_limit_message(wait)
+                return await func(telegram_user_id, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(telegram_user_id: int, *args, **kwargs):
+            wait = bucket.allow(telegram_user_id)
+            if wait:
+                return rate_limit_message(wait)
+            return func(telegram_user_id, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Users recently sent a "pending approval" reply; repeats are suppressed so
+# unapproved users can't make the bot spam their chat
+_recently_told = TTLCache(maxsize=4096, ttl=60)
+_told_lock = threading.Lock()
+
+
+def recently_told(user_id: int) -> bool:
+    """True if user_id was already told within the last minute (marks them otherwise)."""
+    with _told_lock:
+        if user_id in _recently_told:
+            return True
+        _recently_told[user_id] = True
+        return False
+
+
+def reset():
+    """Clear all buckets and suppressed replies (tests, or after changing limits)."""
+    DEFAULT.reset()
+    HEAVY.reset()
+    SEND_PER_CHAT.reset()
+    SEND_GLOBAL.reset()
+    with _told_lock:
+        _recently_told.clear()
@@ -0,0 +1,23 @@
+"""Text progress bars shared by the Telegram status messages."""
+
+from __future__ import annotations
+
+BAR_WIDTHS = (10, 15)
+
+# Every bar the bot shows, indexed [width][filled cells] - built once here
+# so rendering a row is a lookup rather than string building
+PRECOMPUTED_BARS = {
+    width: tuple(f"[{'█' * i}{'░' * (width - i)}]" for i in range(width + 1))
+    for width in BAR_WIDTHS
+}
+BARS_10 = PRECOMPUTED_BARS[10]  # /cartridges, /tanks
+BARS_15 = PRECOMPUTED_BARS[15]  # /progress
+
+
+def progress_bar(percent: float, width: int = 10) -> str:
+    """Render a 0-100 percentage as a `[███░░░░░░░]` bar."""
+    filled = min(width, max(0, int(percent / 100 * width)))
+    bars = PRECOMPUTED_BARS.get(width)
+    if bars is None:
+        return f"[{'█' * filled}{'░' * (width - filled)}]"
+    return bars[filled]
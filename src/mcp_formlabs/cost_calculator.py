@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta
-from typing import Any
+from typing import Any, Iterable
 
 # Approximate retail prices per liter (USD)
 RESIN_PRICES_PER_LITER = {
@@ -57,11 +57,11 @@ def estimate_print_cost(
     }
 
 
-def summarize_costs(prints: list[dict]) -> dict:
+def summarize_costs(prints: Iterable[dict]) -> dict:
     """Summarize costs across multiple prints.
 
     Args:
-        prints: List of PrintRun dicts from the Web API
+        prints: PrintRun dicts from the Web API (any iterable, e.g. a stream)
 
     Returns:
         Cost summary dict
@@ -0,0 +1,33 @@
+"""Shared HTTP connection pool for the PreForm and Web API clients."""
+
+from __future__ import annotations
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+POOL_SIZE = 32
+
+# One adapter (and so one urllib3 pool manager) mounted on every client
+# session: keep-alive TCP/TLS connections are reused across clients, while
+# each session keeps its own headers, so one user's token never rides along
+# on another user's requests.
+# Only connection failures are retried here: HTTP statuses (429 with its
+# Retry-After in particular) are left to the clients' own handling.
+_ADAPTER = HTTPAdapter(
+    pool_connections=POOL_SIZE,
+    pool_maxsize=POOL_SIZE,
+    max_retries=Retry(
+        total=2, connect=2, read=0, status=0, backoff_factor=0.2,
+        respect_retry_after_header=False,
+    ),
+)
+
+
+def pooled_session() -> requests.Session:
+    """Create a Session whose connections come from the shared pool."""
+    session = requests.Session()
+    session.mount("https://", _ADAPTER)
+    session.mount("http://", _ADAPTER)
+    session.headers["Connection"] = "keep-alive"
+    return session
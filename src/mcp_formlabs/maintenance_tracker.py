@@ -100,36 +100,60 @@ class MaintenanceTracker:
         self, user_id: int, printer_serial: str
     ) -> list[dict]:
         """Get all due/overdue maintenance tasks for a printer."""
+        return self.get_due_tasks_bulk(user_id, [printer_serial])[printer_serial]
+
+    def get_due_tasks_bulk(
+        self, user_id: int, serials: list[str]
+    ) -> dict[str, list[dict]]:
+        """Get due/overdue tasks for several printers with a single query."""
+        if not serials:
+            return {}
+        placeholders = ",".join("?" * len(serials))
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                f"SELECT printer_serial, task_id, MAX(completed_at) FROM maintenance_log WHERE user_id=? AND printer_serial IN ({placeholders}) GROUP BY printer_serial, task_id",
+                (user_id, *serials),
+            ).fetchall()
+        last_done = {(serial, task_id): datetime.fromisoformat(ts) for serial, task_id, ts in rows}
+
         now = datetime.now()
-        due = []
-        for task_id, task in MAINTENANCE_TASKS.items():
-            last = self.get_last_done(user_id, printer_serial, task_id)
-            interval = timedelta(days=task["interval_days"])
-
-            if last is None:
-                days_overdue = task["interval_days"]
-                status = "never_done"
-            elif now - last > interval:
-                days_overdue = (now - last).days - task["interval_days"]
-                status = "overdue"
-            else:
-                days_until = (last + interval - now).days
-                days_overdue = -days_until
-                status = "ok"
-
-            due.append({
-                "task_id": task_id,
-                "name": task["name"],
-                "description": task["description"],
-                "severity": task["severity"],
-                "interval_days": task["interval_days"],
-                "last_done": last.isoformat() if last else None,
-                "status": status,
-                "days_overdue": days_overdue,
-            })
-
-        due.sort(key=lambda d: d["days_overdue"], reverse=True)
-        return due
+        return {
+            serial: _due_tasks({task_id: last_done.get((serial, task_id)) for task_id in MAINTENANCE_TASKS}, now)
+            for serial in serials
+        }
+
+
+def _due_tasks(last_done: dict[str, datetime | None], now: datetime) -> list[dict]:
+    """Task statuses for one printer, most overdue first."""
+    due = []
+    for task_id, task in MAINTENANCE_TASKS.items():
+        last = last_done[task_id]
+        interval = timedelta(days=task["interval_days"])
+
+        if last is None:
+            days_overdue = task["interval_days"]
+            status = "never_done"
+        elif now - last > interval:
+            days_overdue = (now - last).days - task["interval_days"]
+            status = "overdue"
+        else:
+            days_until = (last + interval - now).days
+            days_overdue = -days_until
+            status = "ok"
+
+        due.append({
+            "task_id": task_id,
+            "name": task["name"],
+            "description": task["description"],
+            "severity": task["severity"],
+            "interval_days": task["interval_days"],
+            "last_done": last.isoformat() if last else None,
+            "status": status,
+            "days_overdue": days_overdue,
+        })
+
+    due.sort(key=lambda d: d["days_overdue"], reverse=True)
+    return due
 
 
 def format_maintenance_status(
@@ -4,11 +4,20 @@ from __future__ import annotations
 
 import os
 import time
+from datetime import datetime
 from typing import Any
 
 import requests
 from dotenv import load_dotenv
 
+from mcp_formlabs.http_pool import pooled_session
+
+try:
+    import orjson  # faster decoding of large device/job/print lists
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 load_dotenv()
 
 DEFAULT_BASE_URL = "http://localhost:44388"
@@ -16,6 +25,16 @@ POLL_INTERVAL = 1.0
 POLL_TIMEOUT = 300.0
 
 
+def _parse_expiry(expires_at: str | None) -> float | None:
+    """ISO-8601 token expiry to a Unix timestamp (None if absent or malformed)."""
+    if not expires_at:
+        return None
+    try:
+        return datetime.fromisoformat(expires_at).timestamp()
+    except ValueError:
+        return None
+
+
 class PreFormError(Exception):
     """Raised when a PreForm API call fails."""
 
@@ -28,13 +47,19 @@ class PreFormError(Exception):
 class PreFormClient:
     """Stateful HTTP client for the PreForm Local API."""
 
-    def __init__(self, base_url: str | None = None, token: str | None = None):
+    def __init__(
+        self,
+        base_url: str | None = None,
+        token: str | None = None,
+        session: requests.Session | None = None,
+    ):
         self.base_url = (
             base_url or os.getenv("PREFORM_API_URL") or DEFAULT_BASE_URL
         ).rstrip("/")
-        self.session = requests.Session()
+        self.session = session or pooled_session()
         self.session.headers.update({"Content-Type": "application/json"})
         self._token = token
+        self.token_expires_at: float | None = None  # Unix time, if the keychain knows it
 
     def set_token(self, token: str) -> None:
         """Set the authentication token for API requests."""
@@ -58,6 +83,7 @@ class PreFormClient:
             creds = get_token(telegram_user_id)
             if creds and creds.formlabs_token:
                 self.set_token(creds.formlabs_token)
+                self.token_expires_at = _parse_expiry(creds.expires_at)
                 return True
         except Exception:
             pass
@@ -107,7 +133,7 @@ class PreFormClient:
 
         content_type = resp.headers.get("Content-Type", "")
         if "application/json" in content_type:
-            return resp.json()
+            return orjson.loads(resp.content) if HAS_ORJSON else resp.json()
         return resp.text
 
     def _get(self, path: str, **kwargs: Any) -> Any:
@@ -5,6 +5,8 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any
 
+from mcp_formlabs.bars import progress_bar
+
 # Estimated max layers by tank type (conservative estimates)
 TANK_MAX_LAYERS = {
     "standard": 15000,
@@ -84,7 +86,7 @@ def format_tank_status(tanks: list[dict]) -> str:
         else:
             icon = "🟢"
 
-        bar = _progress_bar(a["percent_used"])
+        bar = progress_bar(a["percent_used"])
         name = a["display_name"] or a["serial"][:12]
         lines.append(f"{icon} *{name}*")
         lines.append(f"   Material: {a['material']}")
@@ -102,9 +104,3 @@ def format_tank_status(tanks: list[dict]) -> str:
         lines.append(f"💡 {warning} tank(s) approaching end of life.")
 
     return "\n".join(lines)
-
-
-def _progress_bar(percent: float, width: int = 10) -> str:
-    filled = int(percent / 100 * width)
-    empty = width - filled
-    return f"[{'█' * filled}{'░' * empty}]"
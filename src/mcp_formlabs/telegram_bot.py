@@ -86,15 +86,18 @@ async def login_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         else:
             await update.message.reply_text(f"❌ Login failed: {message}")
 
-    # Note: callback needs to be sync for the auth server
+    # Note: callback needs to be sync for the auth server, which calls it
+    # from its own thread - capture our loop now and hand the coroutine over
+    loop = asyncio.get_running_loop()
+
     def sync_callback(success: bool, message: str) -> None:
         # Schedule the async callback in the event loop
         try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                asyncio.create_task(on_login_complete(success, message))
+            loop.call_soon_threadsafe(
+                lambda: asyncio.ensure_future(on_login_complete(success, message))
+            )
         except Exception:
-            pass  # Best effort notification
+            pass  # Best effort notification (loop may be closed)
 
     # Register callback (token is in the URL path)
     token = login_url.split("/")[-1]
@@ -185,14 +188,14 @@ async def printers_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
             await update.message.reply_text("No printers found in your fleet.")
             return
 
-        msg = "🖨 *Your Printers*\n\n"
+        parts = ["🖨 *Your Printers*\n\n"]
         for device in devices[:10]:  # Limit to 10
             name = device.get("name", "Unknown")
             status = device.get("status", "unknown")
             emoji = "🟢" if status == "ready" else "🟡" if status == "printing" else "🔴"
-            msg += f"{emoji} {name} - {status}\n"
+            parts.append(f"{emoji} {name} - {status}\n")
 
-        await update.message.reply_text(msg, parse_mode="Markdown")
+        await update.message.reply_text("".join(parts), parse_mode="Markdown")
     except PreFormError as e:
         await update.message.reply_text(f"❌ Error fetching printers: {e}")
 
@@ -219,7 +222,7 @@ async def jobs_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             await update.message.reply_text("No print jobs found.")
             return
 
-        msg = "📋 *Print Jobs*\n\n"
+        parts = ["📋 *Print Jobs*\n\n"]
         for job in jobs[:10]:  # Limit to 10
             name = job.get("name", "Unnamed")
             status = job.get("status", "unknown")
@@ -228,9 +231,9 @@ async def jobs_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
                 "🔄" if status == "printing" else
                 "⏳" if status == "queued" else "❓"
             )
-            msg += f"{emoji} {name} - {status}\n"
+            parts.append(f"{emoji} {name} - {status}\n")
 
-        await update.message.reply_text(msg, parse_mode="Markdown")
+        await update.message.reply_text("".join(parts), parse_mode="Markdown")
     except PreFormError as e:
         await update.message.reply_text(f"❌ Error fetching jobs: {e}")
 
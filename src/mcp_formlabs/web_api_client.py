@@ -5,18 +5,37 @@ Handles OAuth2 authentication, rate limiting, and pagination.
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import os
+import threading
 import time
-from typing import Any
+from typing import Any, Iterator
 
 import requests
+from cachetools import TTLCache
 from dotenv import load_dotenv
 
+from mcp_formlabs.http_pool import pooled_session
+
+try:
+    import orjson  # faster decoding of large device/job/print lists
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import ijson  # streams print pages instead of parsing them whole
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
 load_dotenv()
 
 BASE_URL = "https://api.formlabs.com/developer/v1"
 TOKEN_URL = f"{BASE_URL}/o/token/"
 REVOKE_URL = f"{BASE_URL}/o/revoke_token/"
+RESPONSE_TTL = 45  # seconds list_* responses are reused across commands
 
 
 class WebAPIError(Exception):
@@ -28,6 +47,21 @@ class WebAPIError(Exception):
         super().__init__(f"Web API error {status_code}: {detail}")
 
 
+def _cached_response(func):
+    """Reuse a list_* result for RESPONSE_TTL seconds per (method, arguments)."""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        key = (func.__name__, args, tuple(sorted(kwargs.items())))
+        with self._responses_lock:
+            if key in self._responses:
+                return self._responses[key]
+        result = func(self, *args, **kwargs)
+        with self._responses_lock:
+            self._responses[key] = result
+        return result
+    return wrapper
+
+
 class FormlabsWebClient:
     """Client for the Formlabs Web API with OAuth2 auth and rate limiting."""
 
@@ -36,13 +70,19 @@ class FormlabsWebClient:
         client_id: str | None = None,
         client_secret: str | None = None,
         access_token: str | None = None,
+        session: requests.Session | None = None,
     ):
         self.client_id = client_id or os.getenv("FORMLABS_CLIENT_ID", "")
         self.client_secret = client_secret or os.getenv("FORMLABS_CLIENT_SECRET", "")
         self._access_token = access_token
         self._token_expires_at: float = 0
-        self.session = requests.Session()
+        self.session = session or pooled_session()
         self._request_timestamps: list[float] = []
+        # Commands fan requests out over a thread pool on one client
+        self._rate_lock = threading.Lock()
+        self._auth_lock = threading.Lock()
+        self._responses: TTLCache = TTLCache(maxsize=256, ttl=RESPONSE_TTL)
+        self._responses_lock = threading.Lock()
 
     # ── Authentication ──────────────────────────────────────────────
 
@@ -85,34 +125,60 @@ class FormlabsWebClient:
         self._access_token = None
         self._token_expires_at = 0
 
-    def _ensure_auth(self) -> None:
-        """Auto-refresh token if expired."""
+    def ensure_authenticated(self) -> None:
+        """Auto-refresh token if expired (thread-safe; may block on a token request)."""
         if self._access_token and time.time() < self._token_expires_at:
             return
-        if self.client_id and self.client_secret:
-            self.authenticate()
-        elif self._access_token:
-            self.session.headers.update(
-                {"Authorization": f"Bearer {self._access_token}"}
-            )
+        with self._auth_lock:
+            # Another thread may have refreshed it while we waited
+            if self._access_token and time.time() < self._token_expires_at:
+                return
+            if self.client_id and self.client_secret:
+                self.authenticate()
+            elif self._access_token:
+                self.session.headers.update(
+                    {"Authorization": f"Bearer {self._access_token}"}
+                )
 
     @property
     def is_authenticated(self) -> bool:
         return bool(self._access_token)
 
+    def cache_bust(self) -> None:
+        """Forget cached list_* responses (after something changed)."""
+        with self._responses_lock:
+            self._responses.clear()
+
     # ── Rate Limiting ───────────────────────────────────────────────
 
+    def _rate_limit_delay(self) -> float:
+        """Simple rate limiter: max 80 req/sec (buffer from 100 limit).
+        
+        Reserves the next request slot and returns how long to wait for it.
+        """
+        with self._rate_lock:
+            now = time.time()
+            self._request_timestamps = [
+                t for t in self._request_timestamps if now - t < 1.0
+            ]
+            delay = 0.0
+            if len(self._request_timestamps) >= 80:
+                # A second after the 80th most recent slot, so concurrent
+                # callers queue up behind each other instead of sharing a slot
+                delay = max(0.0, self._request_timestamps[-80] + 1.0 - now)
+            self._request_timestamps.append(now + delay)
+            return delay
+
     def _check_rate_limit(self) -> None:
-        """Simple rate limiter: max 80 req/sec (buffer from 100 limit)."""
-        now = time.time()
-        self._request_timestamps = [
-            t for t in self._request_timestamps if now - t < 1.0
-        ]
-        if len(self._request_timestamps) >= 80:
-            sleep_time = 1.0 - (now - self._request_timestamps[0])
-            if sleep_time > 0:
-                time.sleep(sleep_time)
-        self._request_timestamps.append(time.time())
+        delay = self._rate_limit_delay()
+        if delay:
+            time.sleep(delay)
+
+    async def _check_rate_limit_async(self) -> None:
+        """_check_rate_limit() that waits without blocking the event loop."""
+        delay = self._rate_limit_delay()
+        if delay:
+            await asyncio.sleep(delay)
 
     # ── HTTP Helpers ────────────────────────────────────────────────
 
@@ -126,7 +192,7 @@ class FormlabsWebClient:
         data: dict | None = None,
         timeout: float = 30.0,
     ) -> Any:
-        self._ensure_auth()
+        self.ensure_authenticated()
         self._check_rate_limit()
 
         url = f"{BASE_URL}{path}" if path.startswith("/") else f"{BASE_URL}/{path}"
@@ -142,10 +208,13 @@ class FormlabsWebClient:
         if resp.status_code >= 400:
             raise WebAPIError(resp.status_code, resp.text[:500])
 
+        if method != "GET":
+            self.cache_bust()
+
         if not resp.content:
             return {"status": "ok"}
 
-        return resp.json()
+        return orjson.loads(resp.content) if HAS_ORJSON else resp.json()
 
     def _get(self, path: str, **kwargs: Any) -> Any:
         return self._request("GET", path, **kwargs)
@@ -171,6 +240,7 @@ class FormlabsWebClient:
 
     # ── Printers ────────────────────────────────────────────────────
 
+    @_cached_response
     def list_printers(self) -> list[dict]:
         """GET /printers/ - List all printers."""
         result = self._get("/printers/")
@@ -182,10 +252,28 @@ class FormlabsWebClient:
 
     # ── Prints ──────────────────────────────────────────────────────
 
+    @_cached_response
     def list_prints(self, **filters: Any) -> dict:
         """GET /prints/ - List prints with filters (status, date__gt, date__lt, material, printer, page, per_page)."""
         return self._get("/prints/", params={k: v for k, v in filters.items() if v is not None})
 
+    def iter_prints(self, **filters: Any) -> Iterator[dict]:
+        """Yield one page of prints, parsed incrementally as it downloads when ijson is installed."""
+        params = {k: v for k, v in filters.items() if v is not None}
+        if HAS_IJSON:
+            self.ensure_authenticated()
+            self._check_rate_limit()
+            with self.session.get(f"{BASE_URL}/prints/", params=params, stream=True, timeout=30.0) as resp:
+                if resp.status_code >= 400 and resp.status_code != 429:
+                    raise WebAPIError(resp.status_code, resp.text[:500])
+                if resp.status_code != 429:
+                    resp.raw.decode_content = True
+                    yield from ijson.items(resp.raw, "results.item", use_float=True)
+                    return
+        # No ijson, or rate limited: the regular path (which waits out a 429)
+        result = self.list_prints(**params)
+        yield from result.get("results", []) if isinstance(result, dict) else result
+
     def list_all_prints(self, **filters: Any) -> list[dict]:
         """Fetch all pages of prints."""
         return self._paginate_all("/prints/", **{k: v for k, v in filters.items() if v is not None})
@@ -196,6 +284,7 @@ class FormlabsWebClient:
 
     # ── Tanks ───────────────────────────────────────────────────────
 
+    @_cached_response
     def list_tanks(self, page: int = 1, per_page: int = 50) -> dict:
         """GET /tanks/ - List resin tanks."""
         return self._get("/tanks/", params={"page": page, "per_page": per_page})
@@ -206,6 +295,7 @@ class FormlabsWebClient:
 
     # ── Cartridges ──────────────────────────────────────────────────
 
+    @_cached_response
     def list_cartridges(self, page: int = 1, per_page: int = 50) -> dict:
         """GET /cartridges/ - List resin cartridges."""
         return self._get("/cartridges/", params={"page": page, "per_page": per_page})
@@ -222,6 +312,7 @@ class FormlabsWebClient:
 
     # ── Groups ──────────────────────────────────────────────────────
 
+    @_cached_response
     def list_groups(self) -> list[dict]:
         """GET /groups/ - List all printer groups."""
         result = self._get("/groups/")
@@ -231,3 +322,17 @@ class FormlabsWebClient:
         """GET /groups/{group_id}/queue/ - List group queue items."""
         result = self._get(f"/groups/{group_id}/queue/")
         return result if isinstance(result, list) else result.get("results", [])
+
+    async def get_group_queue_async(self, group_id: str, session: Any) -> list[dict]:
+        """get_group_queue() on a caller-owned aiohttp.ClientSession, for use from an event loop.
+        
+        Doesn't refresh the token: run ensure_authenticated() (in a thread)
+        once before gathering these.
+        """
+        await self._check_rate_limit_async()
+        headers = {"Authorization": self.session.headers.get("Authorization", "")}
+        async with session.get(f"{BASE_URL}/groups/{group_id}/queue/", headers=headers) as resp:
+            if resp.status >= 400:
+                raise WebAPIError(resp.status, (await resp.text())[:500])
+            result = orjson.loads(await resp.read()) if HAS_ORJSON else await resp.json()
+        return result if isinstance(result, list) else result.get("results", [])
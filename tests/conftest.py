@@ -175,3 +175,11 @@ def patch_keychain():
     with patch("mcp_formlabs.keychain.subprocess") as mock_sub:
         mock_sub.run.return_value = MagicMock(returncode=1, stdout="", stderr="")
         yield mock_sub
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    """Give every test fresh per-user command budgets."""
+    import rate_limit
+    rate_limit.reset()
+    yield
@@ -0,0 +1,67 @@
+"""Tests for access_control.py."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import access_control
+from approval_system import approve_user, is_approved, reject_user, _load_approved
+
+
+@pytest.fixture(autouse=True)
+def access_files(tmp_path, monkeypatch):
+    """Point access control at empty temp files with a cold cache."""
+    monkeypatch.setattr(access_control, "ACCESS_FILE", tmp_path / "approved_users.json")
+    monkeypatch.setattr(access_control, "OPS_FILE", tmp_path / "approved_users.log")
+    monkeypatch.setattr(access_control, "LOG_FILE", tmp_path / "access_requests.log")
+    for key, value in list(access_control._CACHE.items()):
+        monkeypatch.setitem(access_control._CACHE, key, value)
+    access_control._CACHE["mtime"] = None
+    access_control._CACHE["checked"] = float("-inf")
+    return tmp_path
+
+
+ADMIN = 6217674573
+
+
+class TestApprovalCache:
+    def test_admin_always_allowed(self):
+        assert is_approved(ADMIN)
+        assert access_control.is_admin(ADMIN)
+        assert not access_control.is_admin(42)
+
+    def test_approve_and_reject_visible_immediately(self):
+        assert not is_approved(42)
+        approve_user(42, ADMIN)
+        assert is_approved(42)
+        reject_user(42, ADMIN)
+        assert not is_approved(42)
+
+    def test_snapshot_identity_changes_only_on_change(self):
+        before = _load_approved()
+        assert _load_approved() is before
+        approve_user(42, ADMIN)
+        after = _load_approved()
+        assert after is not before
+        assert 42 in after and 42 not in before
+
+    def test_changes_persisted(self, access_files):
+        approve_user(42, ADMIN)
+        access_control._CACHE["mtime"] = None
+        access_control._CACHE["checked"] = float("-inf")
+        assert 42 in access_control._load_data()["approved"]
+
+    def test_corrupt_snapshot_falls_back_to_admins(self, access_files):
+        access_control.ACCESS_FILE.write_bytes(b'{"approved": [4')
+        assert is_approved(ADMIN)
+        assert not is_approved(42)
+        allowed, _ = access_control.request_access(43, "newbie")
+        assert not allowed
+        access_control._flush()  # e.g. the atexit flush - nothing left to repeat
+        assert access_control._pending_ops == []
+        lines = access_control.OPS_FILE.read_bytes().splitlines()
+        assert [access_control._loads(line)["uid"] for line in lines] == [43]
+        assert access_control._CACHE["state"][43] == access_control.STATE_PENDING
@@ -0,0 +1,99 @@
+"""Tests for bob/bot.py."""
+
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import rate_limit
+from bob import bot
+
+
+@pytest.fixture
+def slept(monkeypatch):
+    rate_limit.reset()
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr("rate_limit.asyncio.sleep", fake_sleep)
+    yield slept
+    rate_limit.reset()
+
+
+def _update(user_id=5):
+    update = MagicMock()
+    update.effective_user.id = user_id
+    update.message.chat_id = user_id
+    update.message.text = "/printers"
+    placeholder = MagicMock(chat_id=user_id, edit_text=AsyncMock(), delete=AsyncMock())
+    update.message.reply_text = AsyncMock(return_value=placeholder)
+    return update, placeholder
+
+
+def _context():
+    context = MagicMock(args=None)
+    tasks = []
+    context.application.create_task = lambda coro, update=None: tasks.append(asyncio.ensure_future(coro))
+    return context, tasks
+
+
+class TestPlaceholders:
+    @pytest.mark.asyncio
+    async def test_fast_result_edited_in_without_waiting(self, slept):
+        update, placeholder = _update()
+        context, tasks = _context()
+        with patch("bob.commands.handle_command_async", AsyncMock(return_value="🖨️ Form 4")):
+            await bot._dispatch("/printers", update, context)
+            await asyncio.gather(*tasks)
+        update.message.reply_text.assert_awaited_once_with(bot.PLACEHOLDERS["printers"])
+        placeholder.edit_text.assert_awaited_once_with("🖨️ Form 4", parse_mode="Markdown")
+        assert slept == []
+
+
+class TestPendingApproval:
+    @pytest.mark.asyncio
+    async def test_repeat_notice_suppressed(self, slept):
+        from bob.commands import PENDING_APPROVAL_MESSAGE
+        update, _ = _update()
+        context, _ = _context()
+        with patch("bob.commands.handle_command_async", AsyncMock(return_value=PENDING_APPROVAL_MESSAGE)):
+            await bot._dispatch("/materials", update, context)
+            await bot._dispatch("/help", update, context)
+        update.message.reply_text.assert_awaited_once_with(PENDING_APPROVAL_MESSAGE, parse_mode="Markdown")
+
+    @pytest.mark.asyncio
+    async def test_gate_replies_once_without_registering(self, slept):
+        import threading
+        from bob.commands import PENDING_APPROVAL_MESSAGE
+        threads = []
+
+        def is_approved(user_id):
+            threads.append(threading.current_thread())
+            return False
+
+        update, _ = _update()
+        callbacks = {"printers": AsyncMock()}
+        with patch("approval_system.is_approved", is_approved), \
+                patch("approval_system.request_access") as request_access:
+            await bot._access_gate(callbacks, update, MagicMock())
+            await bot._access_gate(callbacks, update, MagicMock())
+        update.message.reply_text.assert_awaited_once_with(PENDING_APPROVAL_MESSAGE, parse_mode="Markdown")
+        request_access.assert_not_called()
+        callbacks["printers"].assert_not_called()
+        assert threads and threading.current_thread() not in threads
+
+    @pytest.mark.asyncio
+    async def test_gate_runs_command_once_approved(self, slept):
+        update, _ = _update()
+        callbacks = {"printers": AsyncMock()}
+        context = MagicMock()
+        with patch("approval_system.is_approved", return_value=True):
+            await bot._access_gate(callbacks, update, context)
+        callbacks["printers"].assert_awaited_once_with(update, context)
+        update.message.reply_text.assert_not_called()
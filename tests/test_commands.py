@@ -4,6 +4,8 @@ import sys
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
+import pytest
+
 sys.path.insert(0, str(Path(__file__).parent.parent))
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
@@ -28,6 +30,14 @@ class TestHandleCommand:
         assert "Kim Formlabs Bot" in result
         assert "Admin Commands" not in result
 
+    @patch("bot_commands.is_approved")
+    def test_static_replies_prebuilt(self, mock_approved):
+        mock_approved.return_value = True
+        import bot_commands
+        assert bot_commands.handle_command("/help", 6217674573) is bot_commands.HELP_TEXT_ADMIN
+        assert bot_commands.handle_command("/help", 99999) is bot_commands.HELP_TEXT
+        assert bot_commands.handle_command("/materials", 99999) is bot_commands._MATERIALS_MESSAGE
+
     @patch("bot_commands.get_token")
     def test_status_not_logged_in(self, mock_get_token):
         mock_get_token.return_value = None
@@ -49,6 +59,47 @@ class TestHandleCommand:
         result = handle_command("/printers", 99999)
         assert "pending" in result.lower()
 
+    @patch("bot_commands.is_approved")
+    def test_pending_reply_repeated_for_every_caller(self, mock_approved):
+        # Repeat suppression lives in bob; run_command and OpenClaw always get the reply
+        mock_approved.return_value = False
+        from bot_commands import handle_command, PENDING_APPROVAL_MESSAGE
+        assert handle_command("/printers", 99999) == PENDING_APPROVAL_MESSAGE
+        assert handle_command("/jobs", 99999) == PENDING_APPROVAL_MESSAGE
+
+    @patch("bot_commands.get_client_for_user")
+    @patch("bot_commands.is_approved")
+    def test_printers_reuses_device_list(self, mock_approved, mock_client, mock_preform_client):
+        mock_approved.return_value = True
+        mock_client.return_value = mock_preform_client
+        import bot_commands
+        bot_commands._devices_cache.clear()
+        first = bot_commands.handle_command("/printers", 99999)
+        second = bot_commands.handle_command("/printers", 99999)
+        assert first == second
+        assert "2 printers" in first
+        mock_preform_client.list_devices.assert_called_once()
+
+    @patch("bot_commands.PreFormClient")
+    def test_client_reused_per_user(self, mock_client_cls):
+        mock_client_cls.return_value.load_token_from_keychain.return_value = True
+        mock_client_cls.return_value.token_expires_at = None
+        import bot_commands
+        bot_commands._client_cache.clear()
+        first = bot_commands.get_client_for_user(99999)
+        assert bot_commands.get_client_for_user(99999) is first
+        mock_client_cls.return_value.load_token_from_keychain.assert_called_once_with(99999)
+
+    @patch("bot_commands.PreFormClient")
+    def test_client_not_cached_past_token_expiry(self, mock_client_cls):
+        mock_client_cls.return_value.load_token_from_keychain.return_value = True
+        mock_client_cls.return_value.token_expires_at = 0.0  # long expired
+        import bot_commands
+        bot_commands._client_cache.clear()
+        bot_commands.get_client_for_user(99999)
+        bot_commands.get_client_for_user(99999)
+        assert mock_client_cls.return_value.load_token_from_keychain.call_count == 2
+
     @patch("bot_commands.is_approved")
     def test_materials_not_approved(self, mock_approved):
         mock_approved.return_value = False
@@ -56,6 +107,15 @@ class TestHandleCommand:
         result = handle_command("/materials", 99999)
         assert "pending" in result.lower()
 
+    @patch("bot_commands.is_approved")
+    def test_materials_grouped_by_category(self, mock_approved):
+        mock_approved.return_value = True
+        from bot_commands import handle_command
+        result = handle_command("/materials", 6217674573)
+        assert result.count("Available Materials") == 1
+        assert "*Standard*\n  • Grey V5\n" in result
+        assert "Tough 2000 V2" in result
+
     @patch("bot_commands.is_admin")
     def test_approve_non_admin(self, mock_admin):
         mock_admin.return_value = False
@@ -63,6 +123,26 @@ class TestHandleCommand:
         result = handle_command("/approve", 99999, args=["12345"])
         assert "admin" in result.lower()
 
+    @patch("bot_commands._auth_session")
+    @patch("bot_commands.is_approved")
+    def test_login_uses_keepalive_session(self, mock_approved, mock_session):
+        mock_approved.return_value = True
+        mock_session.post.return_value = MagicMock(
+            status_code=200,
+            content=b'{"login_url": "http://127.0.0.1:8765/login/abc"}',
+            json=lambda: {"login_url": "http://127.0.0.1:8765/login/abc"},
+        )
+        from bot_commands import handle_command
+        result = handle_command("/login", 6217674573)
+        assert "https://kim.harwav.com/login/abc" in result
+        assert mock_session.post.call_args.args[0].endswith("/api/create-token")
+
+    def test_list_users_admin(self):
+        from bot_commands import handle_command
+        result = handle_command("/users", 6217674573)
+        assert "Approved Users" in result
+        assert "👑 `6217674573`" in result
+
     def test_approve_no_args(self):
         from bot_commands import handle_command
         result = handle_command("/approve", 6217674573)
@@ -73,6 +153,30 @@ class TestHandleCommand:
         result = handle_command("/approve", 6217674573, args=["not_a_number"])
         assert "Invalid" in result
 
+    def test_optional_features_not_imported_eagerly(self):
+        import subprocess
+        root = Path(__file__).parent.parent
+        code = (
+            "import sys; sys.path[:0] = ['src']; import bot_commands; "
+            "print(sorted({'fixture_generator', 'resin_prophet', 'csi_analyzer'} & set(sys.modules)))"
+        )
+        out = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True)
+        assert out.stdout.strip() == "[]", out.stderr
+
+    def test_dispatch_covers_every_command(self):
+        import bot_commands
+        assert bot_commands.DISPATCH.keys() == bot_commands.COMMANDS.keys()
+        assert bot_commands.DISPATCH["/jobs"][1] is bot_commands._call_status
+        assert bot_commands.DISPATCH["/approve"][1] is bot_commands._call_target
+        assert bot_commands.DISPATCH["/status"][1] is bot_commands._call_user
+
+    def test_dispatch_passes_status_filter(self):
+        import bot_commands
+        jobs = MagicMock(return_value="ok")
+        with patch.dict(bot_commands.DISPATCH, {"/jobs": (jobs, bot_commands._call_status)}):
+            assert bot_commands.handle_command("/JOBS", 123, args=["printing"]) == "ok"
+        jobs.assert_called_once_with(123, status_filter="printing")
+
     @patch("bot_commands.is_approved")
     def test_cancel_not_approved(self, mock_approved):
         mock_approved.return_value = False
@@ -87,6 +191,31 @@ class TestHandleCommand:
         result = handle_command("/cancel", 123)
         assert "Usage" in result
 
+    @patch("fixture_generator.generate_fixture")
+    @patch("bot_commands.HAS_FIXTURE", True)
+    @patch("bot_commands.is_approved")
+    def test_fixture_parses_options(self, mock_approved, mock_generate):
+        mock_approved.return_value = True
+        mock_generate.return_value = {"success": False, "error": "no mesh"}
+        from bot_commands import handle_command
+        result = handle_command(
+            "/fixture", 99999, args=["part.stl", "--clearance", "10", "--operation", "soldering"]
+        )
+        assert "no mesh" in result
+        kwargs = mock_generate.call_args.kwargs
+        assert kwargs["operation"] == "soldering"
+        assert kwargs["clearance"] == 10.0
+
+    @patch("fixture_generator.generate_fixture")
+    @patch("bot_commands.HAS_FIXTURE", True)
+    @patch("bot_commands.is_approved")
+    def test_fixture_rejects_bad_clearance(self, mock_approved, mock_generate):
+        mock_approved.return_value = True
+        from bot_commands import handle_command
+        result = handle_command("/fixture", 99999, args=["part.stl", "--clearance", "wide"])
+        assert "Invalid clearance" in result
+        mock_generate.assert_not_called()
+
     @patch("bot_commands.is_approved")
     def test_notify_status(self, mock_approved):
         mock_approved.return_value = True
@@ -175,6 +304,7 @@ class TestHandleCommand:
         result = handle_command("/cartridges", 123)
         assert "Cartridge Status" in result
         assert "Grey V5" in result
+        assert "1 cartridge(s) below 30%" in result
 
     @patch("bot_commands.is_approved")
     @patch("bot_commands._get_web_client")
@@ -184,3 +314,181 @@ class TestHandleCommand:
         from bot_commands import handle_command
         result = handle_command("/fleet", 123)
         assert "Fleet Dashboard" in result
+
+    @patch("bot_commands.is_approved")
+    @patch("bot_commands._get_web_client")
+    def test_queue_across_groups(self, mock_web, mock_approved, mock_web_client):
+        mock_approved.return_value = True
+        mock_web.return_value = mock_web_client
+        mock_web_client.list_groups.return_value = [
+            {"id": "g1", "name": "Main Lab"},
+            {"id": "g2", "name": "Annex"},
+        ]
+        mock_web_client.get_group_queue.side_effect = lambda gid: [
+            {"name": f"{gid}.stl", "material_name": "Grey V5"},
+        ]
+        from bot_commands import handle_command
+        result = handle_command("/queue", 123)
+        assert "1. g1.stl (Grey V5) — Main Lab" in result
+        assert "2. g2.stl (Grey V5) — Annex" in result
+
+    @patch("bot_commands.is_approved")
+    @patch("bot_commands._get_web_client")
+    def test_batch_runs_each_command(self, mock_web, mock_approved, mock_web_client):
+        mock_approved.return_value = True
+        mock_web.return_value = mock_web_client
+        from bot_commands import handle_command
+        result = handle_command("/batch", 123, args=["/fleet;", "/cartridges", ";", "/notify", "status"])
+        assert result.index("Fleet Dashboard") < result.index("Cartridge Status") < result.index("Notifications")
+        assert "nested" in handle_command("/batch", 123, args=["/help;", "/batch", "/help"])
+        assert "Usage" in handle_command("/batch", 123)
+
+    @patch("bot_commands.time.time", return_value=1_700_000_000)
+    @patch("bot_commands.is_approved")
+    @patch("bot_commands._get_web_client")
+    def test_cost_period_filter(self, mock_web, mock_approved, mock_time, mock_web_client):
+        mock_approved.return_value = True
+        mock_web.return_value = mock_web_client
+        mock_web_client.iter_prints.return_value = iter([])
+        from bot_commands import handle_command, _since_for
+        handle_command("/cost", 123, args=["bogus"])
+        since = mock_web_client.iter_prints.call_args.kwargs["date__gt"]
+        assert since == _since_for("month", 1_700_000_000 // 60)
+        handle_command("/cost", 123, args=["all"])
+        assert "date__gt" not in mock_web_client.iter_prints.call_args.kwargs
+
+    @patch("bot_commands.is_approved")
+    @patch("bot_commands.FormlabsWebClient")
+    def test_web_client_cached_until_401(self, mock_client_cls, mock_approved):
+        mock_approved.return_value = True
+        from mcp_formlabs.web_api_client import WebAPIError
+        import bot_commands
+        bot_commands._web_client_cache.clear()
+        client = mock_client_cls.return_value
+        client.list_tanks.side_effect = WebAPIError(401, "expired")
+        assert bot_commands._get_web_client(123) is bot_commands._get_web_client(123)
+        client.authenticate.assert_called_once()
+        result = bot_commands.handle_command("/tanks", 123)
+        assert "401" in result
+        assert 123 not in bot_commands._web_client_cache
+
+
+class TestHandleCommandAsync:
+    @pytest.mark.asyncio
+    async def test_approve_no_args(self):
+        from bot_commands import handle_command_async
+        result = await handle_command_async("/approve", 6217674573)
+        assert "Usage" in result
+
+    @pytest.mark.asyncio
+    @patch("bot_commands.is_admin")
+    async def test_reject_non_admin(self, mock_admin):
+        mock_admin.return_value = False
+        from bot_commands import handle_command_async
+        result = await handle_command_async("/reject", 99999, args=["12345"])
+        assert "admin" in result.lower()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_sync_commands(self):
+        from bot_commands import handle_command_async
+        result = await handle_command_async("/help", 99999)
+        assert "Kim Formlabs Bot" in result
+
+    @pytest.mark.asyncio
+    @patch("bot_commands.is_approved")
+    async def test_login_not_approved(self, mock_approved):
+        mock_approved.return_value = False
+        from bot_commands import handle_command_async
+        result = await handle_command_async("/login", 99999, username="newuser")
+        assert "Approval Required" in result
+
+    @pytest.mark.asyncio
+    @patch("bot_commands._create_token_async")
+    @patch("bot_commands.is_approved")
+    async def test_login_returns_public_link(self, mock_approved, mock_create):
+        mock_approved.return_value = True
+        mock_create.return_value = (200, {"login_url": "http://127.0.0.1:8765/login/abc"})
+        from bot_commands import handle_command_async
+        result = await handle_command_async("/login", 6217674573)
+        assert "https://kim.harwav.com/login/abc" in result
+
+    @pytest.mark.asyncio
+    @patch("csi_analyzer.cmd_csi")
+    @patch("bot_commands.HAS_CSI", True)
+    @patch("bot_commands.is_approved")
+    async def test_csi_runs_off_loop(self, mock_approved, mock_csi):
+        mock_approved.return_value = True
+        mock_csi.return_value = "report"
+        from bot_commands import cmd_csi_command_async
+        assert await cmd_csi_command_async(99999, image_path="fail.jpg") == "report"
+        mock_csi.assert_called_once_with("fail.jpg")
+
+    @pytest.mark.asyncio
+    @patch("csi_analyzer.cmd_csi")
+    @patch("bot_commands.HAS_CSI", True)
+    @patch("bot_commands.is_approved")
+    async def test_csi_resent_photo_joins_running_analysis(self, mock_approved, mock_csi, tmp_path):
+        import asyncio
+        import time
+        mock_approved.return_value = True
+        mock_csi.side_effect = lambda path: time.sleep(0.1) or "report"
+        photo = tmp_path / "fail.jpg"
+        photo.write_bytes(b"jpeg")
+        from bot_commands import cmd_csi_command_async, _csi_inflight
+        results = await asyncio.gather(
+            cmd_csi_command_async(99998, image_path=str(photo)),
+            cmd_csi_command_async(99998, image_path=str(photo)),
+        )
+        assert results == ["report", "report"]
+        mock_csi.assert_called_once()
+        assert not _csi_inflight
+
+    @pytest.mark.asyncio
+    @patch("bot_commands._csi_slots")
+    @patch("bot_commands.HAS_CSI", True)
+    @patch("bot_commands.is_approved")
+    async def test_csi_busy(self, mock_approved, mock_slots):
+        mock_approved.return_value = True
+        mock_slots.locked.return_value = True
+        from bot_commands import cmd_csi_command_async
+        result = await cmd_csi_command_async(99999, image_path="fail.jpg")
+        assert "busy" in result
+
+    @pytest.mark.asyncio
+    @patch("bot_commands.get_client_for_user")
+    @patch("bot_commands.is_approved")
+    async def test_sync_commands_run_in_pool(self, mock_approved, mock_client, mock_preform_client):
+        import threading
+        mock_approved.return_value = True
+        threads = []
+        mock_preform_client.list_jobs.side_effect = lambda status=None: threads.append(
+            threading.current_thread().name
+        ) or []
+        mock_client.return_value = mock_preform_client
+        from bot_commands import handle_command_async
+        result = await handle_command_async("/jobs", 99999)
+        assert "No print jobs" in result
+        assert threads and threads[0].startswith("io")
+
+    @pytest.mark.asyncio
+    @patch("bot_commands._get_http_session")
+    @patch("bot_commands.HAS_AIOHTTP", True)
+    @patch("bot_commands.is_approved")
+    @patch("bot_commands._get_web_client")
+    async def test_queue_gathers_group_queues(self, mock_web, mock_approved, mock_session, mock_web_client):
+        from unittest.mock import AsyncMock
+        mock_approved.return_value = True
+        mock_web.return_value = mock_web_client
+        mock_web_client.list_groups.return_value = [{"id": "g1", "name": "Main Lab"}, {"id": "g2", "name": "Annex"}]
+        mock_web_client.get_group_queue_async = AsyncMock(
+            side_effect=lambda gid, session: [{"name": f"{gid}.stl", "material_name": "Grey V5"}]
+        )
+        from bot_commands import handle_command_async
+        result = await handle_command_async("/queue", 123)
+        assert "1. g1.stl (Grey V5) — Main Lab" in result
+        assert "2. g2.stl (Grey V5) — Annex" in result
+        mock_web_client.get_group_queue.assert_not_called()
+        mock_web_client.ensure_authenticated.assert_called_once()
+        # ...before any of the gathered requests started
+        first = [c[0] for c in mock_web_client.mock_calls].index("get_group_queue_async")
+        assert [c[0] for c in mock_web_client.mock_calls].index("ensure_authenticated") < first
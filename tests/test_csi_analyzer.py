@@ -0,0 +1,114 @@
+"""Tests for csi_analyzer.py."""
+
+import json
+import os
+import sys
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import csi_analyzer
+from csi_analyzer import CSIAnalyzer
+
+
+ANSWER = {
+    "primary_issue": "delamination",
+    "summary": "Layers separated",
+    "findings": [{"issue_type": "delamination", "severity": "major", "description": "gap"}],
+    "root_cause": "Worn tank",
+    "suggested_fixes": ["Replace tank"],
+    "prevention_tips": [],
+    "confidence_score": 0.8,
+}
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    path = tmp_path / "csi"
+    monkeypatch.setattr(csi_analyzer._cache, "directory", path)
+    return path
+
+
+def _response():
+    content = json.dumps(ANSWER)
+    return MagicMock(status_code=200, content=json.dumps({"choices": [{"message": {"content": content}}]}))
+
+
+class TestParseAnswer:
+    @pytest.mark.parametrize("content", [
+        json.dumps(ANSWER),
+        "```json\n" + json.dumps(ANSWER) + "\n```",
+        "Here you go:\n```\n" + json.dumps(ANSWER) + "\n```\nGood luck!",
+    ])
+    def test_plain_and_fenced(self, content):
+        assert csi_analyzer._parse_answer(content) == ANSWER
+
+    def test_unparseable(self):
+        with pytest.raises(json.JSONDecodeError):
+            csi_analyzer._parse_answer("I cannot see a print in this photo.")
+
+
+class TestSession:
+    def test_session_carries_auth(self):
+        analyzer = CSIAnalyzer(api_key="test")
+        assert analyzer._session.headers["Authorization"] == "Bearer test"
+        assert analyzer._session.get_adapter(CSIAnalyzer.API_URL)._pool_maxsize == 8
+
+    def test_request_body_spliced(self, tmp_path, cache_dir):
+        image = tmp_path / "print.png"
+        image.write_bytes(b"fake png")
+        analyzer = CSIAnalyzer(api_key="test")
+        with patch("csi_analyzer.requests.Session.post", return_value=_response()) as post:
+            analyzer.analyze(image)
+        
+        body = json.loads(post.call_args.kwargs["data"].getvalue())
+        assert body["messages"][0]["content"] == CSIAnalyzer.SYSTEM_PROMPT
+        image_url = body["messages"][1]["content"][1]["image_url"]
+        assert image_url == {"url": "data:image/png;base64,ZmFrZSBwbmc=", "detail": "high"}
+        assert body["max_tokens"] == 1500
+
+    def test_commands_reuse_analyzer(self):
+        assert csi_analyzer._analyzer("test") is csi_analyzer._analyzer("test")
+
+
+class TestAnalysisCache:
+    def test_same_image_analyzed_once(self, tmp_path, cache_dir):
+        image = tmp_path / "print.jpg"
+        image.write_bytes(b"\xff\xd8fake jpeg")
+        copy = tmp_path / "resent.jpg"
+        copy.write_bytes(image.read_bytes())
+        
+        analyzer = CSIAnalyzer(api_key="test")
+        with patch("csi_analyzer.requests.Session.post", return_value=_response()) as post:
+            first = analyzer.analyze(image)
+            second = analyzer.analyze(copy)
+        
+        assert post.call_count == 1
+        assert second == first
+        assert second.findings[0].severity == "major"
+        assert len(list(cache_dir.glob("*.json"))) == 1
+
+    def test_least_recently_used_evicted(self, cache_dir, monkeypatch):
+        monkeypatch.setattr(csi_analyzer._cache, "max_entries", 2)
+        for i, key in enumerate(["a", "b"]):
+            csi_analyzer._cache.put(key, {"n": i})
+            os.utime(cache_dir / f"{key}.json", (i, i))
+        assert csi_analyzer._cache.get("a") == {"n": 0}  # now the freshest
+        csi_analyzer._cache.put("c", {"n": 2})
+        
+        assert csi_analyzer._cache.get("b") is None
+        assert csi_analyzer._cache.get("a") == {"n": 0}
+        assert len(list(cache_dir.glob("*.json"))) == 2
+
+
+class TestIssueInfo:
+    def test_known_and_unknown(self):
+        assert "Relevel build platform" in csi_analyzer.get_issue_info("layer_shift")["fixes"]
+        assert csi_analyzer.get_issue_info("gremlins")["fixes"] == ()
+
+    def test_read_only(self):
+        with pytest.raises(TypeError):
+            csi_analyzer.ISSUE_DESCRIPTIONS["warping"]["fixes"] = ()
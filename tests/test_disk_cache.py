@@ -0,0 +1,48 @@
+"""Tests for disk_cache.py."""
+
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import csi_analyzer
+import disk_cache
+import fixture_generator
+from disk_cache import DiskCache, file_digest
+
+
+class TestFileDigest:
+    def test_content_hash(self, tmp_path):
+        a, b, empty = tmp_path / "a.bin", tmp_path / "b.bin", tmp_path / "empty.bin"
+        a.write_bytes(b"layer shift")
+        b.write_bytes(b"layer shift")
+        empty.write_bytes(b"")
+        assert file_digest(a) == file_digest(b) == hashlib.blake2b(b"layer shift", digest_size=16).hexdigest()
+        assert file_digest(empty) == hashlib.blake2b(digest_size=16).hexdigest()
+
+
+class TestDiskCache:
+    def _cache(self, tmp_path, max_entries=10):
+        cache = DiskCache("test", ".json", max_entries, dumps=lambda v: json.dumps(v).encode(), loads=json.loads)
+        cache.directory = tmp_path / "test"
+        return cache
+
+    def test_round_trip_and_miss(self, tmp_path):
+        cache = self._cache(tmp_path)
+        assert cache.get("k") is None
+        cache.put("k", {"n": 1})
+        assert cache.get("k") == {"n": 1}
+        assert not list(cache.directory.glob("*.tmp"))
+
+    def test_unreadable_entry_is_a_miss(self, tmp_path):
+        cache = self._cache(tmp_path)
+        cache.put("k", {"n": 1})
+        (cache.directory / "k.json").write_bytes(b"{truncated")
+        assert cache.get("k") is None
+
+    def test_caches_share_one_root(self):
+        for cache in (csi_analyzer._cache, fixture_generator._disk_cache):
+            assert cache.directory.parent == disk_cache.CACHE_ROOT
+        assert csi_analyzer._cache.directory != fixture_generator._disk_cache.directory
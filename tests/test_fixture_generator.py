@@ -0,0 +1,193 @@
+"""Tests for fixture_generator.py."""
+
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import trimesh
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import fixture_generator
+from fixture_generator import (
+    FLAT_DIRECTIONS, FLAT_THRESHOLD, FixtureGenerator, MeshAnalyzer, StandardLibrary,
+)
+
+
+def _face_arrays(mesh):
+    return mesh.face_normals, mesh.area_faces, mesh.triangles_center
+
+
+class TestStandardLibrary:
+    def test_get_normalizes_key(self):
+        assert StandardLibrary.get("iPhone 15-Pro").name == "iPhone 15 Pro"
+        assert StandardLibrary.get("nothing") is None
+
+    def test_search_keys_and_names(self):
+        assert [key for key, _ in StandardLibrary.search("IPHONE")] == [
+            "iphone_15_pro", "iphone_15_pro_max", "iphone_14"
+        ]
+        assert [key for key, _ in StandardLibrary.search("galaxy")] == ["samsung_s24"]
+
+    def test_search_columns_match_library(self):
+        assert StandardLibrary._KEYS == tuple(StandardLibrary.LIBRARY)
+
+    def test_trigram_search_matches_linear_scan(self):
+        for query in ("pro max", "15 pro", "bear", "IPHONE 14", "zzz", "pi", ""):
+            expected = [
+                key for key, obj in StandardLibrary.LIBRARY.items()
+                if query.lower() in key or query.lower() in obj.name.lower()
+            ]
+            assert [key for key, _ in StandardLibrary.search(query)] == expected
+        assert "pro" in StandardLibrary._TRIGRAMS
+
+
+class TestFlatSurfaces:
+    def test_box_faces(self):
+        mesh = trimesh.creation.box((10, 20, 30))
+        arrays = (np.asarray(a, dtype=np.float32) for a in _face_arrays(mesh))
+        surfaces = MeshAnalyzer()._find_flat_surfaces(*arrays)
+        by_name = {s.name: s for s in surfaces}
+        assert set(by_name) == set(FLAT_DIRECTIONS)
+        assert by_name["top"].area == pytest.approx(200.0)
+        assert by_name["top"].center == pytest.approx((0, 0, 15))
+        assert by_name["top"].normal == (0, 0, 1)
+        assert surfaces[0].area == pytest.approx(600.0)  # largest first
+        assert all(type(c) is float for c in by_name["top"].center)
+
+    @patch("fixture_generator.HAS_NUMBA", False)
+    @patch("fixture_generator._flat_surface_sums_jit", None)
+    def test_numpy_fallback(self):
+        analyzer = MeshAnalyzer()
+        big = trimesh.creation.icosphere(subdivisions=3)
+        small = trimesh.creation.box((10, 20, 30))
+        analyzer._find_flat_surfaces(*(np.asarray(a, dtype=np.float32) for a in _face_arrays(big)))
+        surfaces = analyzer._find_flat_surfaces(
+            *(np.asarray(a, dtype=np.float32) for a in _face_arrays(small))
+        )
+        assert len(surfaces) == 6
+        assert max(s.area for s in surfaces) == pytest.approx(600.0)
+
+    def test_analyze_passes_contiguous_float32(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(fixture_generator._disk_cache, "directory", tmp_path / "mesh")
+        monkeypatch.setattr(fixture_generator, "_analysis_cache", fixture_generator.LRUCache(1))
+        stl = tmp_path / "part.stl"
+        trimesh.creation.box((10, 20, 30)).export(stl)
+        analyzer = MeshAnalyzer()
+        with patch.object(analyzer, "_find_flat_surfaces", wraps=analyzer._find_flat_surfaces) as find:
+            analyzer.analyze(stl)
+        for array in find.call_args.args:
+            assert array.dtype == np.float32
+            assert array.flags["C_CONTIGUOUS"]
+
+    def test_kernel_matches_numpy(self):
+        assert fixture_generator._require_numpy()
+        mesh = trimesh.creation.icosphere(subdivisions=3, radius=20)
+        targets = np.array(list(FLAT_DIRECTIONS.values()), dtype=np.float64)
+        kernel = fixture_generator._flat_surface_sums(*_face_arrays(mesh), targets, FLAT_THRESHOLD)
+        numpy = fixture_generator._flat_surface_sums_numpy(*_face_arrays(mesh), targets, FLAT_THRESHOLD)
+        for a, b in zip(kernel, numpy):
+            np.testing.assert_allclose(a, b)
+
+
+class TestAnalysisCache:
+    @pytest.fixture
+    def cache_dir(self, tmp_path, monkeypatch):
+        path = tmp_path / "mesh"
+        monkeypatch.setattr(fixture_generator._disk_cache, "directory", path)
+        fixture_generator._analysis_cache.clear()
+        yield path
+        fixture_generator._analysis_cache.clear()
+
+    def test_same_file_analyzed_once(self, tmp_path, cache_dir):
+        stl = tmp_path / "part.stl"
+        trimesh.creation.box((10, 20, 30)).export(stl)
+        copy = tmp_path / "part_v2.stl"
+        copy.write_bytes(stl.read_bytes())
+        
+        analyzer = MeshAnalyzer()
+        with patch("fixture_generator.trimesh.load_mesh", wraps=trimesh.load_mesh) as load:
+            first = analyzer.analyze(stl)
+            second = analyzer.analyze(copy)
+        assert load.call_count == 1
+        assert second.filename == "part_v2.stl"
+        assert second.dimensions == first.dimensions
+        assert len(list(cache_dir.glob("*.pkl"))) == 1
+
+    def test_disk_cache_survives_restart(self, tmp_path, cache_dir):
+        stl = tmp_path / "part.stl"
+        trimesh.creation.box((10, 20, 30)).export(stl)
+        first = MeshAnalyzer().analyze(stl)
+        fixture_generator._analysis_cache.clear()
+        with patch("fixture_generator.trimesh.load_mesh") as load:
+            again = MeshAnalyzer().analyze(stl)
+        load.assert_not_called()
+        assert again == first
+
+    def test_quick_analysis_cached_separately(self, tmp_path, cache_dir):
+        stl = tmp_path / "part.stl"
+        trimesh.creation.box((10, 20, 30)).export(stl)
+        quick = MeshAnalyzer().analyze(stl, full=False)
+        full = MeshAnalyzer().analyze(stl)
+        assert quick.volume == 0.0
+        assert full.volume == pytest.approx(6000.0)
+        assert quick.dimensions == full.dimensions
+
+
+class TestLazyImports:
+    def test_import_skips_mesh_libraries(self):
+        code = (
+            "import sys, fixture_generator; "
+            "assert fixture_generator.StandardLibrary.search('iphone'); "
+            "assert not {'trimesh', 'numpy', 'scipy'} & set(sys.modules)"
+        )
+        subprocess.run(
+            [sys.executable, "-c", code], cwd=Path(__file__).parent.parent, check=True
+        )
+
+    def test_analyzer_loads_libraries(self):
+        MeshAnalyzer()
+        assert fixture_generator.trimesh is trimesh
+        assert fixture_generator.np is np
+
+
+class TestGenerate:
+    def test_scad_values_and_braces(self, tmp_path):
+        obj = StandardLibrary.get("iphone_14")
+        config = fixture_generator.FixtureConfig("drilling", clearance=2.5)
+        scad = Path(FixtureGenerator(tmp_path).generate(obj, config, name="phone")).read_text()
+        assert scad.startswith("// Fixture for: phone\n")
+        assert "// Operation: drilling\n" in scad
+        assert f"object_length = {obj.length:.2f};\n" in scad
+        assert "clearance = 2.50;\n" in scad
+        assert "module fixture() {\n    difference() {\n" in scad
+        assert scad.count("{") == scad.count("}") == 4
+
+    def test_overwrites_existing_file(self, tmp_path):
+        stale = tmp_path / "phone.scad"
+        stale.write_text("x" * 100_000)
+        config = fixture_generator.FixtureConfig("drilling")
+        path = FixtureGenerator(tmp_path).generate(StandardLibrary.get("iphone_14"), config, name="phone")
+        assert Path(path) == stale
+        assert stale.read_text().endswith("fixture();\n")
+
+
+class TestRenderBatch:
+    @patch("fixture_generator.subprocess.run")
+    def test_renders_every_file_in_order(self, mock_run, tmp_path):
+        scads = []
+        for i in range(5):
+            scad = tmp_path / f"fixture_{i}.scad"
+            scad.write_text("cube(1);")
+            scads.append(scad)
+        
+        stls = FixtureGenerator().render_stl_batch(scads)
+        assert stls == [str(p.with_suffix(".stl")) for p in scads]
+        rendered = sorted(call.args[0][1] for call in mock_run.call_args_list)
+        assert rendered == sorted(str(p) for p in scads)
+
+    def test_empty_batch(self):
+        assert FixtureGenerator().render_stl_batch([]) == []
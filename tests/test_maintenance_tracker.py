@@ -63,6 +63,12 @@ class TestMaintenanceTracker:
         optical = next(t for t in tasks if t["task_id"] == "optical_window_clean")
         assert optical["status"] == "never_done"
 
+    def test_get_due_tasks_bulk(self):
+        self.tracker.mark_done(1, "ABC", "optical_window_clean")
+        due = self.tracker.get_due_tasks_bulk(1, ["ABC", "DEF"])
+        assert due["ABC"] == self.tracker.get_due_tasks(1, "ABC")
+        assert all(t["status"] == "never_done" for t in due["DEF"])
+
 
 class TestFormatMaintenanceStatus:
     def test_format_all_overdue(self):
@@ -31,6 +31,21 @@ class TestPreFormClient:
         client.set_token("")
         assert "Authorization" not in client.session.headers
 
+    @patch("mcp_formlabs.keychain.get_token")
+    def test_load_token_records_expiry(self, mock_get_token):
+        mock_get_token.return_value = MagicMock(
+            formlabs_token="tok", expires_at="2030-01-01T00:00:00+00:00"
+        )
+        client = PreFormClient()
+        assert client.load_token_from_keychain(42)
+        assert client.token_expires_at == 1893456000.0
+
+    def test_sessions_share_pool_not_headers(self):
+        a, b = PreFormClient(), PreFormClient()
+        a.set_token("mytoken")
+        assert a.session.get_adapter(a.base_url) is b.session.get_adapter(b.base_url)
+        assert "Authorization" not in b.session.headers
+
     def test_url_builder(self):
         client = PreFormClient(base_url="http://localhost:44388")
         assert client._url("/devices/") == "http://localhost:44388/devices/"
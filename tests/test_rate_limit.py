@@ -0,0 +1,85 @@
+"""Tests for rate_limit.py."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import rate_limit
+from rate_limit import TokenBucket, rate_limited
+
+
+class TestTokenBucket:
+    def test_allows_burst_then_waits(self):
+        bucket = TokenBucket(rate=0.5, burst=3)
+        assert [bucket.allow(1) for _ in range(3)] == [0.0, 0.0, 0.0]
+        wait = bucket.allow(1)
+        assert 0 < wait <= 2.0
+
+    def test_users_are_independent(self):
+        bucket = TokenBucket(rate=0.5, burst=1)
+        assert bucket.allow(1) == 0.0
+        assert bucket.allow(1) > 0
+        assert bucket.allow(2) == 0.0
+
+    def test_refills_over_time(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr("rate_limit.time.monotonic", lambda: now[0])
+        bucket = TokenBucket(rate=0.5, burst=1)
+        assert bucket.allow(1) == 0.0
+        assert bucket.allow(1) > 0
+        now[0] += 2.0
+        assert bucket.allow(1) == 0.0
+
+    def test_cost_goes_into_debt(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr("rate_limit.time.monotonic", lambda: now[0])
+        bucket = TokenBucket(rate=1.0, burst=1)
+        assert bucket.allow(1, cost=3) == 0.0
+        assert bucket.allow(1) == pytest.approx(3.0)
+
+
+class TestSendSlot:
+    @pytest.mark.asyncio
+    async def test_long_reply_delays_next_send(self, monkeypatch):
+        rate_limit.reset()
+        now = [100.0]
+        slept = []
+        monkeypatch.setattr("rate_limit.time.monotonic", lambda: now[0])
+
+        async def fake_sleep(seconds):
+            slept.append(seconds)
+            now[0] += seconds
+
+        monkeypatch.setattr("rate_limit.asyncio.sleep", fake_sleep)
+        await rate_limit.send_slot(1, "x" * 5000)  # two message parts
+        await rate_limit.send_slot(2, "hi")  # other chats are not held up
+        assert slept == []
+        await rate_limit.send_slot(1, "hi")
+        assert sum(slept) == pytest.approx(2.0)
+        rate_limit.reset()
+
+
+class TestRateLimited:
+    def test_returns_message_when_limited(self):
+        bucket = TokenBucket(rate=0.1, burst=1)
+
+        @rate_limited(bucket)
+        def cmd(telegram_user_id):
+            return "ok"
+
+        assert cmd(1) == "ok"
+        assert "Rate limit" in cmd(1)
+
+    @pytest.mark.asyncio
+    async def test_async_commands(self):
+        bucket = TokenBucket(rate=0.1, burst=1)
+
+        @rate_limited(bucket)
+        async def cmd(telegram_user_id):
+            return "ok"
+
+        assert await cmd(1) == "ok"
+        assert "Rate limit" in await cmd(1)
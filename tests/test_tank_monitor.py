@@ -12,6 +12,7 @@ from mcp_formlabs.tank_monitor import (
     THRESHOLD_WARNING,
     THRESHOLD_CRITICAL,
 )
+from mcp_formlabs.bars import BARS_10, BARS_15, progress_bar
 
 
 class TestEstimateTankLife:
@@ -73,3 +74,19 @@ class TestFormatTankStatus:
         tanks = [{"serial": "T1", "material": "FLGPGR05", "layers_printed": int(max_l * 0.95), "tank_type": "standard"}]
         result = format_tank_status(tanks)
         assert "replacement" in result.lower()
+
+
+class TestProgressBar:
+    def test_widths(self):
+        assert progress_bar(50) == "[█████░░░░░]"
+        assert progress_bar(100, 15) == "[" + "█" * 15 + "]"
+        assert progress_bar(0, 4) == "[░░░░]"
+
+    def test_clamped(self):
+        assert progress_bar(150) == progress_bar(100)
+        assert progress_bar(-5) == progress_bar(0)
+
+    def test_tables(self):
+        assert len(BARS_10) == 11 and len(BARS_15) == 16
+        assert BARS_15[7] == "[" + "█" * 7 + "░" * 8 + "]"
+        assert all(progress_bar(i * 10) == BARS_10[i] for i in range(11))
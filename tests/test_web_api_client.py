@@ -1,8 +1,10 @@
 """Tests for web_api_client.py."""
 
+import json
 import sys
+import time
 from pathlib import Path
-from unittest.mock import MagicMock, patch, PropertyMock
+from unittest.mock import AsyncMock, MagicMock, patch, PropertyMock
 
 import pytest
 
@@ -45,6 +47,15 @@ class TestFormlabsWebClient:
         with pytest.raises(WebAPIError):
             client.authenticate()
 
+    def test_request_decodes_body(self):
+        client = FormlabsWebClient(access_token="tok")
+        body = b'{"count": 1, "results": [{"guid": "x", "volume_ml": 1.5}]}'
+        resp = MagicMock(status_code=200, content=body, json=lambda: json.loads(body))
+        with patch.object(client.session, "request", return_value=resp):
+            result = client._get("/prints/")
+        assert result == {"count": 1, "results": [{"guid": "x", "volume_ml": 1.5}]}
+        assert type(result) is dict
+
     def test_list_printers(self):
         client = FormlabsWebClient(access_token="tok")
         with patch.object(client, "_get", return_value=[{"serial": "ABC"}]) as mock:
@@ -67,6 +78,24 @@ class TestFormlabsWebClient:
             assert result["count"] == 1
             mock.assert_called_once()
 
+    def test_list_prints_cached_until_bust(self):
+        client = FormlabsWebClient(access_token="tok")
+        with patch.object(client, "_get", return_value={"count": 0, "results": []}) as mock:
+            client.list_prints(status="PRINTING", per_page=20)
+            client.list_prints(per_page=20, status="PRINTING")
+            assert mock.call_count == 1
+            client.list_prints(status="QUEUED", per_page=20)
+            assert mock.call_count == 2
+            client.cache_bust()
+            client.list_prints(status="PRINTING", per_page=20)
+            assert mock.call_count == 3
+
+    @patch("mcp_formlabs.web_api_client.HAS_IJSON", False)
+    def test_iter_prints_without_ijson(self):
+        client = FormlabsWebClient(access_token="tok")
+        with patch.object(client, "_get", return_value={"count": 2, "results": [{"guid": "a"}, {"guid": "b"}]}):
+            assert [p["guid"] for p in client.iter_prints(status="FINISHED")] == ["a", "b"]
+
     def test_list_cartridges(self):
         client = FormlabsWebClient(access_token="tok")
         with patch.object(client, "_get", return_value={"count": 0, "results": []}) as mock:
@@ -91,6 +120,28 @@ class TestFormlabsWebClient:
             result = client.get_group_queue("g1")
             assert result == []
 
+    @pytest.mark.asyncio
+    async def test_group_queue_async_keeps_blocking_work_off_loop(self):
+        import threading
+        import time
+        client = FormlabsWebClient(client_id="id", client_secret="secret")
+        auth_threads = []
+        client.authenticate = lambda: auth_threads.append(threading.current_thread())
+        client._request_timestamps = [time.time()] * 80  # limit reached
+        resp = MagicMock(status=200)
+        resp.read = AsyncMock(return_value=b'[{"name": "a.stl"}]')
+        resp.json = AsyncMock(return_value=[{"name": "a.stl"}])
+        session = MagicMock()
+        session.get.return_value.__aenter__ = AsyncMock(return_value=resp)
+        session.get.return_value.__aexit__ = AsyncMock(return_value=False)
+        with patch("mcp_formlabs.web_api_client.time.sleep") as blocking_sleep, \
+                patch("mcp_formlabs.web_api_client.asyncio.sleep", new=AsyncMock()) as async_sleep:
+            result = await client.get_group_queue_async("g1", session)
+        assert result == [{"name": "a.stl"}]
+        assert auth_threads == []  # the caller refreshes once, before gathering
+        blocking_sleep.assert_not_called()
+        async_sleep.assert_awaited_once()
+
     def test_list_events(self):
         client = FormlabsWebClient(access_token="tok")
         with patch.object(client, "_get", return_value={"count": 0, "results": []}) as mock:
@@ -107,6 +158,33 @@ class TestFormlabsWebClient:
             result = client._paginate_all("/test/")
             assert len(result) == 2
 
+    def test_rate_limit_holds_across_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+        client = FormlabsWebClient(access_token="tok")
+        with ThreadPoolExecutor(16) as pool:
+            delays = list(pool.map(lambda _: client._rate_limit_delay(), range(240)))
+        slots = client._request_timestamps
+        assert len(slots) == 240  # no reservation lost
+        assert sum(1 for d in delays if d == 0) <= 80
+        assert all(later - earlier >= 1.0 - 1e-9 for earlier, later in zip(slots, slots[80:]))
+
+    def test_concurrent_refresh_authenticates_once(self):
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        client = FormlabsWebClient(client_id="id", client_secret="secret")
+        calls = []
+        ready = threading.Barrier(8)
+
+        def authenticate():
+            calls.append(1)
+            client._access_token = "tok"
+            client._token_expires_at = time.time() + 3600
+
+        client.authenticate = authenticate
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda _: (ready.wait(), client.ensure_authenticated()), range(8)))
+        assert len(calls) == 1
+
     def test_rate_limit_tracking(self):
         client = FormlabsWebClient(access_token="tok")
         # Simulate adding timestamps
@@ -114,3 +192,40 @@ class TestFormlabsWebClient:
         for _ in range(5):
             client._request_timestamps.append(time.time())
         assert len(client._request_timestamps) <= 80  # Well under limit
+
+
+class TestSharedPool:
+    def test_rate_limited_get_retried_by_client(self, monkeypatch):
+        import threading
+        from http.server import BaseHTTPRequestHandler, HTTPServer
+
+        statuses = [429, 200]
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status = statuses.pop(0)
+                body = b'[{"id": "g1"}]' if status == 200 else b""
+                self.send_response(status)
+                if status == 429:
+                    self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            monkeypatch.setattr(
+                "mcp_formlabs.web_api_client.BASE_URL", f"http://127.0.0.1:{server.server_port}"
+            )
+            client = FormlabsWebClient(access_token="tok")
+            with patch("mcp_formlabs.web_api_client.time.sleep") as sleep:
+                assert client._get("/groups/") == [{"id": "g1"}]
+            sleep.assert_called_once_with(0)  # _request's own 429 handling ran
+            assert statuses == []
+        finally:
+            server.shutdown()
+            server.server_close()